@@ -5,11 +5,13 @@
 import time
 import base64
 from abc import ABC, abstractmethod
+from typing import Any
 from urllib.parse import urlencode
 
 import requests
 
 from pyatom.base.log import Logger, init_logger
+from pyatom.client.http import shared_transport
 from pyatom.config import ConfigManager
 
 from pyatom.config import DIR_DEBUG
@@ -51,25 +53,45 @@ class TwoCaptcha(AbsCaptcha):
         "key",
         "logger",
         "base",
+        "transport",
+        "time_out",
     )
 
     def __init__(
-        self, api_key: str, logger: Logger, api_name: str = "2captcha"
+        self,
+        api_key: str,
+        logger: Logger,
+        api_name: str = "2captcha",
+        http2: bool = False,
+        time_out: int = 30,
     ) -> None:
-        """Init 2captcha.com api wrapper."""
+        """Init 2captcha.com api wrapper, with shared keep-alive transport."""
         super().__init__(api_key=api_key, api_name=api_name, logger=logger)
 
         self.base = "http://2captcha.com/"
+        self.transport = shared_transport(http2=http2)
+        self.time_out = time_out
+
+    def http_get(self, url: str) -> Any:
+        """HTTP GET by shared transport."""
+        return self.transport.request("GET", url, timeout=self.time_out)
+
+    def http_post(self, url: str, data: dict) -> Any:
+        """HTTP POST by shared transport."""
+        return self.transport.request("POST", url, data=data, timeout=self.time_out)
 
     def balance(self) -> float:
         """get account balance"""
         param = {"key": self.key, "action": "getbalance", "json": 1}
         url = f"{self.base}res.php?{urlencode(param)}"
-        with requests.get(url, timeout=30) as response:
-            if response and response.status_code == 200:
+        try:
+            response = self.http_get(url)
+            if response.status_code == 200:
                 data = response.json()
                 if data.get("status") == 1:
                     return float(data.get("request") or -1)
+        except self.transport.errors as err:
+            self.logger.exception(err)
         return -1
 
     def recaptcha(self, site_key: str, page_url: str, retry: int = 3) -> str:
@@ -86,11 +108,11 @@ class TwoCaptcha(AbsCaptcha):
         url = f"{self.base}in.php?{urlencode(param)}"
         for i in range(retry):
             try:
-                res = requests.get(url)
+                res = self.http_get(url)
                 cid = res.text.split("|")[1]
                 param2 = {"key": self.key, "action": "get", "id": cid}
                 url2 = f"{self.base}res.php?{urlencode(param2)}"
-                answer = requests.get(url2).text
+                answer: str = self.http_get(url2).text
                 self.logger.info("[{%d}]solving recaptcha...", i)
 
                 j = 12
@@ -105,9 +127,9 @@ class TwoCaptcha(AbsCaptcha):
                     if "CAPCHA_NOT_READY" in answer:
                         self.logger.debug("[%d]%s", i, answer)
                         time.sleep(10)
-                        answer = requests.get(url2).text
+                        answer = self.http_get(url2).text
                     j = j - 1
-            except requests.RequestException as err:
+            except self.transport.errors as err:
                 self.logger.exception(err)
         return ""
 
@@ -116,13 +138,13 @@ class TwoCaptcha(AbsCaptcha):
         payload = {
             "key": self.key,
             "method": "base64",
-            "body": base64.b64encode(raw_image),
+            "body": base64.b64encode(raw_image).decode(),
         }
         url = f"{self.base}in.php"
 
         for i in range(retry):
             try:
-                response = requests.post(url, data=payload)
+                response = self.http_post(url, data=payload)
                 self.logger.debug(
                     "<%d>[%d]%s",
                     response.status_code,
@@ -132,14 +154,14 @@ class TwoCaptcha(AbsCaptcha):
                 cid = response.text.split("|")[1]
                 param2 = {"key": self.key, "action": "get", "id": cid}
                 url2 = f"{self.base}res.php?{urlencode(param2)}"
-                response = requests.get(url2)
+                response = self.http_get(url2)
                 self.logger.debug(
                     "<%d>[%d]%s",
                     response.status_code,
                     len(response.text),
                     response.url,
                 )
-                answer = response.text
+                answer: str = response.text
                 self.logger.info("[%d]solving normal captcha...", i)
 
                 j = 12
@@ -154,9 +176,9 @@ class TwoCaptcha(AbsCaptcha):
                     if "CAPCHA_NOT_READY" in answer:
                         self.logger.debug("[%d]%s", j, answer)
                         time.sleep(10)
-                        answer = requests.get(url2).text
+                        answer = self.http_get(url2).text
                     j = j - 1
-            except requests.RequestException as err:
+            except self.transport.errors as err:
                 self.logger.exception(err)
         return ""
 
@@ -8,9 +8,9 @@
 import os
 from urllib.parse import urlencode
 
-import requests
 import regex as re
 
+from pyatom.client.http import shared_transport
 from pyatom.config import DIR_DEBUG
 from pyatom.config import ConfigManager
 
@@ -23,29 +23,25 @@ class FakeFace:
     FakeFace for profile to posting
     """
 
-    def __init__(self, user_agent: str, proxy_url: str) -> None:
-        """Init FakeFace."""
+    def __init__(self, user_agent: str, proxy_url: str, http2: bool = False) -> None:
+        """Init FakeFace, with shared keep-alive transport for proxy_url."""
         self.user_agent = user_agent
         self.proxy_url = proxy_url
 
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": user_agent})
-
-        if proxy_url:
-            self.session.proxies = {
-                "http": proxy_url,
-                "https": proxy_url,
-            }
+        self.transport = shared_transport(proxy_url=proxy_url, http2=http2)
+        self.headers = {"User-Agent": user_agent} if user_agent else {}
 
     def http_get(self, url: str) -> dict:
         """http get for response"""
         try:
-            resp = self.session.get(url, timeout=30)
-            if resp and resp.status_code == 200:
+            resp = self.transport.request(
+                "GET", url, headers=self.headers, timeout=30
+            )
+            if resp.status_code == 200:
                 data = resp.json()
                 if isinstance(data, dict):
                     return data
-        except requests.RequestException as err:
+        except self.transport.errors as err:
             print(err)
         return {}
 
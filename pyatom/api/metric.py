@@ -4,10 +4,9 @@
     Metrics for Domain, Url, etc. like: DomDetailer API
 """
 
-import requests
-
 from pyatom.base.utils import print2
 from pyatom.base.log import Logger, init_logger
+from pyatom.client.http import shared_transport
 from pyatom.config import ConfigManager
 from pyatom.config import DIR_DEBUG
 
@@ -21,11 +20,20 @@ class DomDetailer:
     Alternative: https://seo-rank.my-addr.com/
     """
 
-    def __init__(self, app: str, key: str, logger: Logger):
-        """Init DomDetailer."""
+    def __init__(
+        self,
+        app: str,
+        key: str,
+        logger: Logger,
+        http2: bool = False,
+        time_out: int = 30,
+    ):
+        """Init DomDetailer, with shared keep-alive transport."""
         self.app = app
         self.key = key
         self.logger = logger
+        self.transport = shared_transport(http2=http2)
+        self.time_out = time_out
 
         self.params = {"apikey": self.key, "app": self.app}
 
@@ -37,11 +45,16 @@ class DomDetailer:
     def balance(self) -> float:
         """Get Account Balance"""
         url = "http://domdetailer.com/api/checkBalance.php"
-        with requests.post(url, data=self.params) as response:
-            if response is not None and "UnitsLeft" in response.text:
+        try:
+            response = self.transport.request(
+                "POST", url, data=self.params, timeout=self.time_out
+            )
+            if "UnitsLeft" in response.text:
                 data = response.json()
                 if isinstance(data, list):
                     return float(data[1])
+        except self.transport.errors as err:
+            self.logger.exception(err)
         return 0.0
 
     def check(
@@ -74,9 +87,15 @@ class DomDetailer:
         params["domain"] = domain
         params["majesticChoice"] = majestic_choice
         url = "http://domdetailer.com/api/checkDomain.php"
-        resp = requests.post(url, data=params)
+        try:
+            resp = self.transport.request(
+                "POST", url, data=params, timeout=self.time_out
+            )
+        except self.transport.errors as err:
+            self.logger.exception(err)
+            return {}
         self.logger.info("<%d>[%d] - %s", resp.status_code, len(resp.text), resp.url)
-        if resp is not None and resp.status_code == 200:
+        if resp.status_code == 200:
             data = resp.json()
             if isinstance(data, dict):
                 if debug:
@@ -6,11 +6,11 @@ from pathlib import Path
 from abc import ABC, abstractmethod
 from typing import Union, Any, Iterable
 from dataclasses import dataclass
-
-import requests
+from functools import lru_cache
 
 from pyatom.base.chars import hash2s
 from pyatom.base.io import IO
+from pyatom.client.http import shared_transport
 from pyatom.config import ConfigManager
 from pyatom.config import DIR_DEBUG
 
@@ -87,11 +87,10 @@ class BaseStock(ABC):
 
     def cache_get(self, request_url: str) -> dict:
         """Get cached response data from local file."""
-        cache_id = hash2s(request_url)
-        for file in self.dir_cache.glob(self.name + self.sep + "*.*"):
-            if cache_id in file.name:
-                return IO.load_dict(file)
-        return {}
+        cache_id = self.to_cache_id(request_url)
+        pattern = self.sep.join([self.name, "*", f"{cache_id}.json"])
+        file = next(self.dir_cache.glob(pattern), None)
+        return IO.load_dict(file) if file else {}
 
     def cache_clear(self) -> bool:
         """Clear cached items."""
@@ -106,9 +105,15 @@ class BaseStock(ABC):
         """Delete cache diretory."""
         return IO.dir_del(self.dir_cache)
 
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def to_cache_id(request_url: str) -> str:
+        """Get cache id of request url, memoized for repeated lookup."""
+        return hash2s(request_url)
+
     def to_cache_file(self, request_url: str) -> Path:
         """Generate random filename corresponding to cache_id and timestamp."""
-        cache_id = hash2s(request_url)
+        cache_id = self.to_cache_id(request_url)
         now_str = str(int(time.time()))
         file_name = self.sep.join([self.name, now_str, cache_id])
         return Path(self.dir_cache, f"{file_name}.json")
@@ -177,11 +182,12 @@ class Pixabay(BaseStock):
 
     """
 
-    def __init__(self, api_key: str, dir_cache: Path) -> None:
-        """Init Pixabay."""
+    def __init__(self, api_key: str, dir_cache: Path, http2: bool = False) -> None:
+        """Init Pixabay, with shared keep-alive transport."""
         super().__init__(name="Pixabay", cache_second=86400, dir_cache=dir_cache)
 
         self.api_key = api_key
+        self.transport = shared_transport(http2=http2)
 
     @staticmethod
     def param_valid(key: str) -> list:
@@ -404,10 +410,9 @@ class Pixabay(BaseStock):
                 url=video.get("url") or "",
             )
 
-    @staticmethod
-    def _request_data(url: str) -> dict:
+    def _request_data(self, url: str) -> dict:
         """Http request to get data from url string."""
-        resp = requests.get(url=url)
+        resp = self.transport.request("GET", url, timeout=30)
 
         if not resp.status_code == 200:
             raise ValueError(resp.text)
@@ -4,23 +4,386 @@
     cls for File/Image Downloading.
 """
 
+import hashlib
+import heapq
+import itertools
 import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, asdict, field
 from pathlib import Path
-from typing import Union, Optional
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Iterator, Union, Optional
 from io import BytesIO
-from zipfile import ZipFile
+from zipfile import ZipFile, ZipInfo
 
+import orjson
 import requests
 from requests import Response
 from tqdm import tqdm
+from urllib3.exceptions import HTTPError as Urllib3Error
 
+from pyatom.base.chars import file_hash
 from pyatom.base.io import IO
-from pyatom.base.log import Logger, init_logger
-from pyatom.config import DIR_DEBUG
-from pyatom.config import ConfigManager
+from pyatom.base.log import Logger
 
 
-__all__ = ("Downloader",)
+__all__ = (
+    "ContentStore",
+    "Downloader",
+    "Flow",
+    "Governor",
+    "GOVERNOR",
+    "Manifest",
+    "Progress",
+)
+
+
+@dataclass
+class Manifest:
+    """Sidecar manifest of completed byte ranges for resumable downloading."""
+
+    url: str
+    size: int
+    etag: str = ""
+    modified: str = ""
+    done: list[list[int]] = field(default_factory=list)
+
+    @staticmethod
+    def to_file(file_out: Union[Path, str]) -> Path:
+        """Get manifest file path next to file_out."""
+        return Path(f"{file_out}.manifest")
+
+    @classmethod
+    def load(cls, file_out: Union[Path, str]) -> Optional["Manifest"]:
+        """Load manifest for file_out, None if not exists or broken."""
+        file = cls.to_file(file_out)
+        if not file.is_file():
+            return None
+        try:
+            data = IO.load_dict(file)
+        except ValueError:
+            return None
+        return cls(
+            url=data.get("url") or "",
+            size=data.get("size") or 0,
+            etag=data.get("etag") or "",
+            modified=data.get("modified") or "",
+            done=data.get("done") or [],
+        )
+
+    def save(self, file_out: Union[Path, str]) -> None:
+        """Save manifest by replacing, never leave half written file."""
+        file = self.to_file(file_out)
+        file_tmp = Path(f"{file}.tmp")
+        IO.save_dict(file_tmp, asdict(self))
+        file_tmp.replace(file)
+
+    def match(self, remote: "Manifest") -> bool:
+        """Check url, size and validators unchanged, False if no validators."""
+        if not (remote.etag or remote.modified):
+            return False
+        return (self.url, self.size, self.etag, self.modified) == (
+            remote.url,
+            remote.size,
+            remote.etag,
+            remote.modified,
+        )
+
+    def missing(self) -> list[tuple[int, int]]:
+        """Get byte ranges not completed yet, as (start, end) end exclusive."""
+        gaps, pos = [], 0
+        for start, end in sorted(self.done):
+            if start > pos:
+                gaps.append((pos, start))
+            pos = max(pos, end)
+        if pos < self.size:
+            gaps.append((pos, self.size))
+        return gaps
+
+    @property
+    def done_size(self) -> int:
+        """Get number of bytes completed."""
+        return self.size - sum(end - start for start, end in self.missing())
+
+
+class Progress:
+    """Thread-safe progress counter, refresh tqdm bar at most every interval.
+
+    Set `enable=False` for headless workers, only count bytes without tqdm.
+    """
+
+    def __init__(
+        self,
+        total: int,
+        initial: int = 0,
+        enable: bool = True,
+        interval: float = 0.5,
+        unit: str = "iB",
+    ) -> None:
+        """Init progress, count bytes by default or other `unit` like `file`."""
+        self.total = total
+        self.count = initial
+        self.interval = interval
+
+        self.pending = 0
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+        self.bar = None
+        if enable:
+            self.bar = tqdm(
+                total=total,
+                initial=initial,
+                unit=unit,
+                unit_scale=unit == "iB",
+                mininterval=interval,
+            )
+
+    def update(self, size: int) -> None:
+        """Add size of bytes, refresh bar if interval passed."""
+        with self.lock:
+            self.count += size
+            if self.bar is None:
+                return
+            self.pending += size
+            now = time.monotonic()
+            if now - self.last >= self.interval:
+                self.bar.update(self.pending)
+                self.pending = 0
+                self.last = now
+
+    def close(self) -> None:
+        """Flush pending bytes and close bar."""
+        with self.lock:
+            if self.bar is not None:
+                self.bar.update(self.pending)
+                self.pending = 0
+                self.bar.close()
+
+
+@dataclass
+class Flow:
+    """Download flow sharing bandwidth by weight within priority class.
+
+    Lower `priority` served first, `size` counts bytes granted.
+    """
+
+    weight: float = 1.0
+    priority: int = 1
+    finish: float = 0.0
+    size: int = 0
+
+
+class Governor:
+    """Process-wide bandwidth governor.
+
+    Global token bucket capped at `rate` bytes/sec, no limit if zero. Waiting
+    chunks granted by strict priority class, then by weighted fair queueing
+    on virtual finish time, so flows share bandwidth by weight.
+    """
+
+    def __init__(self, rate: int = 0, burst: float = 0.1) -> None:
+        """Init governor, bucket holds at most `burst` seconds of tokens."""
+        self.rate = rate
+        self.burst = burst
+
+        self.tokens = 0.0
+        self.stamp = time.monotonic()
+        self.vtime = 0.0
+        self.waiting: list[tuple[int, float, int]] = []
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+
+    def set_rate(self, rate: int, burst: float = 0.0) -> None:
+        """Change bandwidth cap at runtime, zero for no limit."""
+        with self.cond:
+            self._refill()
+            self.rate = rate
+            self.burst = burst or self.burst
+            self.tokens = min(self.tokens, 0.0)
+            self.cond.notify_all()
+
+    @property
+    def quantum(self) -> int:
+        """Get max chunk size per grant, half of burst, zero if no limit."""
+        return max(4096, int(self.rate * self.burst / 2)) if self.rate > 0 else 0
+
+    @staticmethod
+    def flow(weight: float = 1.0, priority: int = 1) -> Flow:
+        """Create new flow for one download."""
+        return Flow(weight=weight, priority=priority)
+
+    def _refill(self) -> None:
+        """Add tokens by time passed, up to burst capacity."""
+        now = time.monotonic()
+        capacity = self.rate * self.burst
+        self.tokens = min(self.tokens + (now - self.stamp) * self.rate, capacity)
+        self.stamp = now
+
+    def acquire(self, flow: Flow, size: int) -> None:
+        """Block until `size` bytes granted for flow.
+
+        Tokens may go negative after grant, debt delays following chunks,
+        keep average throughput at `rate`.
+        """
+        if self.rate <= 0:
+            with self.cond:
+                flow.size += size
+            return
+
+        with self.cond:
+            flow.finish = max(flow.finish, self.vtime) + size / flow.weight
+            ticket = (flow.priority, flow.finish, next(self.counter))
+            heapq.heappush(self.waiting, ticket)
+            while True:
+                if self.waiting[0] is not ticket:
+                    self.cond.wait()
+                    continue
+                if self.rate > 0:
+                    self._refill()
+                    if self.tokens < 0:
+                        self.cond.wait(-self.tokens / self.rate)
+                        continue
+                    self.tokens -= size
+                heapq.heappop(self.waiting)
+                self.vtime = ticket[1]
+                flow.size += size
+                self.cond.notify_all()
+                break
+
+
+GOVERNOR = Governor()
+
+
+class ContentStore:
+    """Content-addressed store, files keyed by sha256 and hardlinked out.
+
+    Layout under `path`:
+        :objects/ab/cdef..., read-only content named by sha256 digest
+        :index.json, url to digest with validators `ETag`/`Last-Modified`
+        :index.jsonl, journal of entries committed since index.json saved
+        :tmp/, partial downloads, moved into objects when verified
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Init store directories, load index and compact journal into it."""
+        self.path = path
+        self.lock = threading.Lock()
+        IO.dir_create(self.path / "objects")
+        IO.dir_create(self.path / "tmp")
+        self.index: dict[str, dict] = self.load()
+        if self.file_journal.is_file():
+            self.save()
+
+    @property
+    def file_index(self) -> Path:
+        """Get index file path."""
+        return self.path / "index.json"
+
+    @property
+    def file_journal(self) -> Path:
+        """Get journal file path, one `[url, entry]` json per line."""
+        return self.path / "index.jsonl"
+
+    def load(self) -> dict[str, dict]:
+        """Load index from file then replay journal, skip broken lines."""
+        try:
+            index = IO.load_dict(self.file_index)
+        except (OSError, ValueError):
+            index = {}
+        try:
+            with open(self.file_journal, "rb") as file:
+                for line in file:
+                    try:
+                        url, entry = orjson.loads(line)
+                    except (orjson.JSONDecodeError, ValueError):
+                        continue
+                    index[url] = entry
+        except OSError:
+            pass
+        return index
+
+    def save(self) -> None:
+        """Save index by replacing, never leave half written file.
+
+        Journal removed after index saved, entries already merged.
+        """
+        with self.lock:
+            file_tmp = self.path / "tmp" / "index.json"
+            IO.save_dict(file_tmp, self.index)
+            file_tmp.replace(self.file_index)
+            self.file_journal.unlink(missing_ok=True)
+
+    def to_object(self, digest: str) -> Path:
+        """Get object file path for sha256 digest."""
+        return self.path / "objects" / digest[:2] / digest[2:]
+
+    def to_temp(self) -> Path:
+        """Get unique temporary file path for partial download."""
+        return self.path / "tmp" / f"{uuid.uuid4().hex}.part"
+
+    def lookup(self, url: str) -> dict:
+        """Get index entry of url, empty if not indexed or object missing."""
+        entry = self.index.get(url) or {}
+        if entry and self.to_object(entry["sha256"]).is_file():
+            return entry
+        return {}
+
+    def commit(
+        self, file_tmp: Path, url: str, digest: str, etag: str = "", modified: str = ""
+    ) -> Path:
+        """Move verified temporary file into objects, index url to digest.
+
+        Entry appended to journal, cost not growing with index size.
+        """
+        file_obj = self.to_object(digest)
+        if file_obj.is_file():
+            file_tmp.unlink(missing_ok=True)
+        else:
+            IO.dir_create(file_obj.parent)
+            file_tmp.chmod(0o444)
+            file_tmp.replace(file_obj)
+
+        entry = {
+            "sha256": digest,
+            "size": file_obj.stat().st_size,
+            "etag": etag,
+            "modified": modified,
+        }
+        with self.lock:
+            self.index[url] = entry
+            with open(self.file_journal, "ab") as file:
+                file.write(orjson.dumps([url, entry]) + b"\n")
+        return file_obj
+
+    def verify(self, digest: str) -> bool:
+        """Check object content still matches digest."""
+        file_obj = self.to_object(digest)
+        return file_obj.is_file() and Downloader.file_sha256(file_obj) == digest
+
+    @staticmethod
+    def link(
+        file_obj: Path, file_out: Union[Path, str], writable: bool = False
+    ) -> None:
+        """Hardlink object to file_out, copy if link not supported.
+
+        Hardlinked file_out is read-only and shares inode with the store
+        object, writing it in place would corrupt every other link. Set
+        `writable` to get independent copy instead.
+        """
+        IO.file_del(file_out)
+        if not writable:
+            try:
+                os.link(file_obj, file_out)
+                return
+            except OSError:
+                pass
+        shutil.copyfile(file_obj, file_out)
+        os.chmod(file_out, 0o644)
 
 
 class Downloader:
@@ -28,26 +391,67 @@ class Downloader:
     Resumable Http Downloader for Large/Medium/Small File
     """
 
-    def __init__(self, user_agent: str, proxy_url: str, logger: Logger) -> None:
-        """Init downloader."""
+    max_chunk = 1024 * 1024
+    errors = (requests.RequestException, Urllib3Error, OSError)
+
+    def __init__(
+        self,
+        user_agent: str,
+        proxy_url: str,
+        logger: Logger,
+        progress: bool = True,
+        store: Optional[ContentStore] = None,
+        governor: Governor = GOVERNOR,
+        weight: float = 1.0,
+        priority: int = 1,
+    ) -> None:
+        """Init downloader, set `progress=False` to disable tqdm bar.
+
+        Download through content `store` if provided. Bandwidth shared by
+        `weight` within `priority` class under process-wide `governor`.
+        """
         self.user_agent = user_agent
         self.proxy_url = proxy_url
         self.logger = logger
-
-        self.session = requests.Session()
-        if user_agent:
-            self.session.headers.update({"User-Agent": user_agent})
-        if proxy_url:
-            self.session.proxies = {
-                "http": proxy_url,
-                "https": proxy_url,
+        self.progress = progress
+        self.store = store
+        self.governor = governor
+        self.weight = weight
+        self.priority = priority
+
+        self.session = self._new_session()
+        self.local = threading.local()
+
+    def _new_session(self) -> requests.Session:
+        """Create new requests session with user_agent and proxy_url."""
+        session = requests.Session()
+        if self.user_agent:
+            session.headers.update({"User-Agent": self.user_agent})
+        if self.proxy_url:
+            session.proxies = {
+                "http": self.proxy_url,
+                "https": self.proxy_url,
             }
+        return session
+
+    def _thread_session(self) -> requests.Session:
+        """Get requests session for current worker thread."""
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self._new_session()
+            self.local.session = session
+        return session
 
     def _head(self, file_url: str) -> Optional[Response]:
         """Head Request"""
         response = self.session.head(file_url, timeout=30)
         return response if isinstance(response, Response) else None
 
+    def remote_size(self, file_url: str) -> int:
+        """Get remote file size by head request, zero if unknown."""
+        response = self._head(file_url)
+        return self._file_size(response) if response is not None else 0
+
     @staticmethod
     def _has_range(response: Response) -> bool:
         """Check if accept range from response headers"""
@@ -62,38 +466,47 @@ class Downloader:
         except (KeyError, ValueError, AttributeError):
             return 0
 
+    def _stream(
+        self, response: Response, chunk_size: int, flow: Optional[Flow] = None
+    ) -> Iterator[memoryview]:
+        """
+        Read response body into reusable buffer by `readinto`
+        Buffer size doubles while reads fill it, up to `max_chunk`, or
+        governor quantum if bandwidth limited. Each chunk granted by governor
+        for `flow` before yield, new flow for this response if not provided.
+        Yielded memoryview only valid until next iteration.
+        """
+        flow = flow or self.governor.flow(self.weight, self.priority)
+        limit = min(self.governor.quantum or self.max_chunk, self.max_chunk)
+        raw = response.raw
+        raw.decode_content = True
+        size = min(chunk_size, limit)
+        view = memoryview(bytearray(size))
+        while True:
+            count = raw.readinto(view)
+            if not count:
+                break
+            self.governor.acquire(flow, count)
+            yield view[:count]
+            if count == size and size < limit:
+                size = min(size * 2, limit)
+                view = memoryview(bytearray(size))
+
     def download_direct(
-        self, file_url: str, file_out: Union[Path, str], chunk_size: int = 1024
+        self, file_url: str, file_out: Union[Path, str], chunk_size: int = 64 * 1024
     ) -> bool:
         """Download In One Shot"""
         with self.session.get(file_url, stream=True) as response:
             response.raise_for_status()
             total_size = self._file_size(response)
             with open(file_out, "wb") as file:
-                progress_bar = tqdm(total=total_size, unit="iB", unit_scale=True)
-                for chunk in response.iter_content(chunk_size=chunk_size):
+                progress = Progress(total=total_size, enable=self.progress)
+                for chunk in self._stream(response, chunk_size):
                     file.write(chunk)
-                    file.flush()
-                    progress_bar.update(len(chunk))
-                    progress_bar.refresh()
-                progress_bar.close()
-
-                return os.stat(file_out).st_size == total_size
+                    progress.update(len(chunk))
+                progress.close()
 
-    def _resume_download(
-        self, file_url: str, start_pos: int, end_pos: int = 0
-    ) -> Response:
-        """
-        Resume download
-        Parameters:
-            :start_pos:int, start position of range
-            :end_pos:int, end position of range, empty if zero
-        """
-        _range = f"bytes={start_pos}-"
-        if end_pos:
-            _range = f"range{end_pos}"
-        self.session.headers["Range"] = _range
-        return self.session.get(file_url, stream=True)
+        return os.stat(file_out).st_size == total_size
 
     def download_ranges(
         self,
@@ -101,61 +514,297 @@ class Downloader:
         file_out: Union[Path, str],
         total_size: int = 0,
         start_pos: int = 0,
-        chunk_size: int = 1024,
+        chunk_size: int = 64 * 1024,
         block_size: int = 1024 * 1024,
     ) -> bool:
         """
-        Downloading By Ranges
+        Downloading By Ranges, one block after another
         Steps:
-            :check local file exists/size
-            :get start_pos/end_pos
-            :resume_download
-            :append new chunk to file if present
+            :load manifest of completed ranges if validators unchanged
+            :fetch missing blocks from start_pos
+            :write block at offset, record into manifest
         """
-        IO.file_del(file_out)
+        return self.download_parallel(
+            file_url=file_url,
+            file_out=file_out,
+            total_size=total_size,
+            workers=1,
+            segment_size=block_size,
+            chunk_size=chunk_size,
+            start_pos=start_pos,
+        )
 
-        if not total_size:
-            # http head method to get response headers
-            response = self._head(file_url)
-            if response is None:
-                self.logger.error("file size error!")
-                return False
+    @staticmethod
+    def _segment_size(total_size: int, workers: int) -> int:
+        """Adaptive segment size, about 4 segments per worker, 1MB ~ 32MB."""
+        min_size, max_size = 1024 * 1024, 32 * 1024 * 1024
+        size = total_size // max(workers * 4, 1)
+        return max(min_size, min(size, max_size))
 
-            total_size = self._file_size(response)
-            if not total_size:
-                self.logger.error("file size error!")
-                return False
+    @staticmethod
+    def _segments(
+        total_size: int, segment_size: int, start_pos: int = 0
+    ) -> list[tuple[int, int]]:
+        """Split bytes range into list of (start, end) segments, end exclusive."""
+        return [
+            (start, min(start + segment_size, total_size))
+            for start in range(start_pos, total_size, segment_size)
+        ]
+
+    def _fetch_segment(
+        self,
+        file_url: str,
+        fd: int,
+        segment: tuple[int, int],
+        chunk_size: int,
+        progress: Progress,
+        validator: str = "",
+        flow: Optional[Flow] = None,
+    ) -> int:
+        """Fetch range segment and write at offset by `os.pwrite`.
+
+        Send `If-Range` with validator, server response full content
+        instead of 206 if remote file changed. Bytes counted into progress
+        taken back if segment failed, so retry never count them twice.
+        """
+        start, end = segment
+        offset = start
+        session = self._thread_session()
+        headers = {"Range": f"bytes={start}-{end - 1}"}
+        if validator:
+            headers["If-Range"] = validator
+        try:
+            with session.get(
+                file_url, headers=headers, stream=True, timeout=30
+            ) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise IOError(f"range not supported or file changed: {file_url}")
+                for chunk in self._stream(response, chunk_size, flow):
+                    chunk = chunk[: end - offset]
+                    os.pwrite(fd, chunk, offset)
+                    offset += len(chunk)
+                    progress.update(len(chunk))
+                    if offset >= end:
+                        break
+
+            if offset != end:
+                raise IOError(f"segment incomplete: {start}-{end} @ {offset}")
+        except Exception:
+            progress.update(start - offset)
+            raise
+        return end - start
+
+    def _fetch_retry(
+        self,
+        file_url: str,
+        fd: int,
+        segment: tuple[int, int],
+        chunk_size: int,
+        progress: Progress,
+        validator: str = "",
+        flow: Optional[Flow] = None,
+        retry: int = 3,
+    ) -> int:
+        """Fetch range segment by `_fetch_segment`, retry up to `retry` times."""
+        args = (file_url, fd, segment, chunk_size, progress, validator, flow)
+        for index in range(retry):
+            try:
+                return self._fetch_segment(*args)
+            except self.errors as err:
+                self.logger.warning("segment %s retry [%d]: %s", segment, index, err)
+        return self._fetch_segment(*args)
+
+    def _manifest(
+        self, file_url: str, file_out: Union[Path, str], total_size: int
+    ) -> Optional[Manifest]:
+        """Load manifest if remote validators unchanged, or start new one."""
+        response = self._head(file_url)
+        if response is None:
+            return None
 
-        with open(file_out, "ab+") as file:
-            progress_bar = tqdm(total=total_size, unit="iB", unit_scale=True)
-            while True:
-                file_size = os.stat(file_out).st_size
-                if file_size >= total_size:
-                    break
-
-                end_pos = start_pos + block_size
-
-                with self._resume_download(
-                    file_url=file_url, start_pos=start_pos, end_pos=end_pos
-                ) as response:
-                    # maybe error if end_pos > content size?
-                    response.raise_for_status()
-                    for chunk in response.iter_content(chunk_size=chunk_size):
-                        file.write(chunk)
-                        file.flush()
-                        progress_bar.update(len(chunk))
-                        progress_bar.refresh()
+        remote = Manifest(
+            url=file_url,
+            size=total_size or self._file_size(response),
+            etag=response.headers.get("ETag", ""),
+            modified=response.headers.get("Last-Modified", ""),
+        )
+        manifest = Manifest.load(file_out)
+        if manifest and manifest.match(remote) and os.path.isfile(file_out):
+            self.logger.info("resume <%d>bytes done: %s", manifest.done_size, file_out)
+            return manifest
 
-                start_pos = end_pos
+        IO.file_del(file_out)
+        return remote
 
-            progress_bar.close()
+    def download_parallel(
+        self,
+        file_url: str,
+        file_out: Union[Path, str],
+        total_size: int = 0,
+        workers: int = 4,
+        segment_size: int = 0,
+        retry: int = 3,
+        chunk_size: int = 64 * 1024,
+        start_pos: int = 0,
+    ) -> bool:
+        """
+        Downloading By Parallel Ranges, resumable by sidecar manifest
+        Steps:
+            :head request for total_size and validators `ETag`/`Last-Modified`
+            :load manifest of completed ranges if validators unchanged
+            :preallocate file_out to total_size
+            :fetch missing segments concurrently, write at offset by `os.pwrite`
+            :record completed segment into manifest
+            :retry failed segment up to `retry` times
+            :delete manifest when all segments completed
+        Parameters:
+            :workers:int, number of concurrent range requests
+            :segment_size:int, bytes per range request, adaptive if zero
+            :start_pos:int, bytes before start_pos treated as completed
+        """
+        manifest = self._manifest(file_url, file_out, total_size)
+        if manifest is None or not manifest.size:
+            self.logger.error("file size error!")
+            return False
+
+        total_size = manifest.size
+        if start_pos and not manifest.done:
+            manifest.done.append([0, start_pos])
+
+        segment_size = segment_size or self._segment_size(total_size, workers)
+        pending = [
+            segment
+            for start, end in manifest.missing()
+            for segment in self._segments(end, segment_size, start)
+        ]
+        validator = manifest.etag or manifest.modified
+
+        fd = os.open(file_out, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, total_size)
+            progress = Progress(
+                total=total_size, initial=manifest.done_size, enable=self.progress
+            )
+            flow = self.governor.flow(self.weight, self.priority)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(
+                        self._fetch_retry,
+                        file_url,
+                        fd,
+                        segment,
+                        chunk_size,
+                        progress,
+                        validator,
+                        flow,
+                        retry,
+                    ): segment
+                    for segment in pending
+                }
+                pending = []
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                        manifest.done.append(list(futures[future]))
+                        manifest.save(file_out)
+                    except self.errors as err:
+                        self.logger.error(err)
+                        pending.append(futures[future])
+            progress.close()
+        finally:
+            os.close(fd)
+
+        if pending:
+            self.logger.error("<%d>segments failed: %s", len(pending), file_url)
+            return False
 
+        Manifest.to_file(file_out).unlink(missing_ok=True)
         return os.stat(file_out).st_size == total_size
 
-    def download(self, file_url: str, file_out: Union[Path, str]) -> bool:
-        """Smart Download"""
+    def download_stored(
+        self,
+        file_url: str,
+        file_out: Union[Path, str],
+        sha256: str = "",
+        revalidate: bool = False,
+        chunk_size: int = 64 * 1024,
+        writable: bool = False,
+    ) -> bool:
+        """
+        Downloading Through Content Store, hardlink object to file_out
+        Steps:
+            :link object if url indexed or `sha256` stored, no network
+            :optional revalidate indexed url by head request validators
+            :stream into temporary file, hash and verify size and sha256
+            :move into objects and index url to digest
+        Parameters:
+            :writable:bool, copy object instead of read-only hardlink
+        """
+        if self.store is None:
+            raise ValueError("content store not provided")
+        store = self.store
+        IO.dir_create(Path(file_out).parent)
+
+        entry = store.lookup(file_url)
+        if entry and revalidate:
+            response = self._head(file_url)
+            headers = response.headers if response is not None else {}
+            if (entry["etag"], entry["modified"]) != (
+                headers.get("ETag", ""),
+                headers.get("Last-Modified", ""),
+            ):
+                entry = {}
+        digest = entry.get("sha256") if entry else sha256
+        if digest and (not sha256 or digest == sha256):
+            file_obj = store.to_object(digest)
+            if file_obj.is_file():
+                store.link(file_obj, file_out, writable)
+                return True
+
+        file_tmp = store.to_temp()
+        hasher = hashlib.sha256()
+        try:
+            with self.session.get(file_url, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                total_size = self._file_size(response)
+                with open(file_tmp, "wb") as file:
+                    progress = Progress(total=total_size, enable=self.progress)
+                    for chunk in self._stream(response, chunk_size):
+                        file.write(chunk)
+                        hasher.update(chunk)
+                        progress.update(len(chunk))
+                    progress.close()
+
+                digest = hasher.hexdigest()
+                if total_size and os.stat(file_tmp).st_size != total_size:
+                    raise IOError(f"download incomplete: {file_url}")
+                if sha256 and digest != sha256:
+                    raise IOError(f"sha256 mismatch: {file_url}")
+                file_obj = store.commit(
+                    file_tmp,
+                    url=file_url,
+                    digest=digest,
+                    etag=response.headers.get("ETag", ""),
+                    modified=response.headers.get("Last-Modified", ""),
+                )
+        finally:
+            IO.file_del(file_tmp)
+
+        store.link(file_obj, file_out, writable)
+        return True
+
+    def download(
+        self, file_url: str, file_out: Union[Path, str], workers: int = 1
+    ) -> bool:
+        """Smart Download, by parallel ranges if `workers` > 1
+
+        Download through content store if provided.
+        """
 
         IO.dir_create(Path(file_out).parent)
+        if self.store is not None:
+            return self.download_stored(file_url=file_url, file_out=file_out)
 
         response = self._head(file_url)
         if response is None:
@@ -167,69 +816,120 @@ class Downloader:
             return False
 
         if self._has_range(response):
+            if workers > 1:
+                return self.download_parallel(
+                    file_url=file_url,
+                    file_out=file_out,
+                    total_size=total_size,
+                    workers=workers,
+                )
             return self.download_ranges(
                 file_url=file_url, file_out=file_out, total_size=total_size
             )
         return self.download_direct(file_url=file_url, file_out=file_out)
 
-    def download_bytes(self, url: str, chunk_size: int = 1024) -> BytesIO:
+    def download_bytes(self, url: str, chunk_size: int = 64 * 1024) -> BytesIO:
         """Download bytes data."""
         with self.session.get(url, stream=True) as response:
             response.raise_for_status()
             total_size = self._file_size(response)
-            progress_bar = tqdm(total=total_size, unit="iB", unit_scale=True)
+            progress = Progress(total=total_size, enable=self.progress)
             _data = BytesIO()
-            for chunk in response.iter_content(chunk_size=chunk_size):
+            for chunk in self._stream(response, chunk_size):
                 _data.write(chunk)
-                progress_bar.update(len(chunk))
-                progress_bar.refresh()
-            progress_bar.close()
+                progress.update(len(chunk))
+            progress.close()
 
             return _data
 
-    @staticmethod
-    def unzip(data: BytesIO, dir_to: Path) -> bool:
-        """Unzip zipped bytes data into file path."""
-        if not dir_to.exists():
-            dir_to.mkdir(parents=True)
-        with ZipFile(data) as file:
-            file.extractall(str(dir_to.absolute()))
-
-        return True
-
-
-class TestDownloader:
-    """Test Downloader."""
-
-    file_config = DIR_DEBUG.parent / "protect" / "config.json"
-    config = ConfigManager().load(file_config)
-
-    def test_downloader(self) -> None:
-        """test downloader by direct or ranges downloading"""
-        app = Downloader(
-            user_agent=self.config.user_agent,
-            proxy_url=self.config.proxy_url,
-            logger=init_logger(name="test"),
-        )
-
-        # url accept ranges
-        file_url_ranges = "http://ipv4.download.thinkbroadband.com/10MB.zip"
-        file_url_ranges = "http://s3.amazonaws.com/alexa-static/top-1m.csv.zip"
-
-        file_tmp = DIR_DEBUG / "ranges.tmp"
-        assert app.download_ranges(file_url=file_url_ranges, file_out=file_tmp)
-        file_tmp.unlink(missing_ok=True)
-        assert file_tmp.is_file() is False
+    def download_spooled(
+        self,
+        url: str,
+        max_memory: int = 32 * 1024 * 1024,
+        chunk_size: int = 64 * 1024,
+        sha256: str = "",
+    ) -> SpooledTemporaryFile:
+        """
+        Download into spooled file, keep in memory up to `max_memory` bytes
+        then roll over to temporary file on disk. Verify sha256 if provided.
+        Caller should close returned file, rewinded to start.
+        """
+        data = SpooledTemporaryFile(max_size=max_memory)
+        hasher = hashlib.sha256()
+        try:
+            with self.session.get(url, stream=True) as response:
+                response.raise_for_status()
+                total_size = self._file_size(response)
+                progress = Progress(total=total_size, enable=self.progress)
+                for chunk in self._stream(response, chunk_size):
+                    data.write(chunk)
+                    hasher.update(chunk)
+                    progress.update(len(chunk))
+                progress.close()
+            if sha256 and hasher.hexdigest() != sha256:
+                raise IOError(f"sha256 mismatch: {url}")
+        except BaseException:
+            data.close()
+            raise
+        data.seek(0)
+        return data
 
-        file_url_direct = "https://www.google.com/images/branding/googlelogo/2x/googlelogo_color_92x30dp.png"
-        file_url_direct = "https://raw.githubusercontent.com/ableco/test-files/master/images/test-image-png_4032x3024.png"
-        file_tmp = DIR_DEBUG / "direct.tmp"
-        assert app.download_direct(file_url=file_url_direct, file_out=file_tmp)
-        file_tmp.unlink(missing_ok=True)
-        assert file_tmp.is_file() is False
+    @staticmethod
+    def file_sha256(file: Union[Path, str], chunk_size: int = 1024 * 1024) -> str:
+        """Calculate sha256 hex digest of file by chunks."""
+        return file_hash(file, "sha256", chunk_size=chunk_size)
 
-        # download bytes and unzip not tested yet as of 2022-02-24
+    @staticmethod
+    def _member_path(dir_to: Path, member: ZipInfo) -> Path:
+        """Get sanitized target path for zip member, same as `ZipFile.extract`."""
+        parts = member.filename.split("/")
+        return dir_to.joinpath(*(x for x in parts if x not in ("", ".", "..")))
+
+    @classmethod
+    def _extract(cls, file: ZipFile, member: ZipInfo, dir_to: Path) -> int:
+        """Extract one member by streaming, keep unix permission bits."""
+        target = cls._member_path(dir_to, member)
+        with file.open(member) as src, open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst, 256 * 1024)
+        mode = (member.external_attr >> 16) & 0o777
+        if mode:
+            target.chmod(mode)
+        return member.file_size
+
+    @classmethod
+    def unzip(
+        cls,
+        data: Union[BinaryIO, BytesIO, SpooledTemporaryFile],
+        dir_to: Path,
+        workers: int = 4,
+    ) -> bool:
+        """Unzip zipped file object into file path.
 
+        Directories created first, then members extracted concurrently by
+        streaming from one shared `ZipFile`, zlib releases GIL.
+        Spooled file unwrapped to its `BytesIO` or disk file, it has no
+        `seekable` for `ZipFile` before python 3.11.
+        """
+        if isinstance(data, SpooledTemporaryFile):
+            data = data._file  # type: ignore # pylint: disable=protected-access
+        dir_to = dir_to.absolute()
+        IO.dir_create(dir_to)
+        with ZipFile(data) as file:
+            members = []
+            for member in file.infolist():
+                target = cls._member_path(dir_to, member)
+                if member.is_dir():
+                    IO.dir_create(target)
+                else:
+                    IO.dir_create(target.parent)
+                    members.append(member)
+
+            members.sort(key=lambda x: x.file_size, reverse=True)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for future in [
+                    executor.submit(cls._extract, file, member, dir_to)
+                    for member in members
+                ]:
+                    future.result()
 
-if __name__ == "__main__":
-    TestDownloader()
+        return True
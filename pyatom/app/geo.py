@@ -2,10 +2,31 @@
     GeoIP Address Data Extracting
 """
 
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import ExitStack
+from dataclasses import asdict, replace
+from datetime import datetime
+from functools import lru_cache
+from ipaddress import IPv4Address
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
 
+import orjson
+import pytz
 from geoip2.database import Reader
+from geoip2.errors import AddressNotFoundError
+from geoip2.models import City
+from maxminddb import MODE_AUTO, MODE_MMAP
+from sqlalchemy import func, select
 
+from pyatom.base.io import IO
+from pyatom.base.orm import Database, Sqlite, TableAddress
 from pyatom.base.timer import utc_offset
 from pyatom.base.structure import Address
 from pyatom.config import DIR_DEBUG
@@ -13,31 +34,38 @@ from pyatom.config import DIR_DEBUG
 
 __all__ = (
     "geoip",
+    "close_resolvers",
+    "geoip_many",
+    "geoip_dump",
+    "GeoResolver",
     "Address",
 )
 
 
-def geoip(ipaddr: str, file_geo: Path) -> Address:
-    """maxmind geoip2 database connection for ip address parser"""
-    res = Reader(str(file_geo)).city(ipaddr)
-    country = res.country.iso_code
-    state = res.subdivisions.most_specific.name
-    city = res.city.name
-    postal = res.postal.code
+@lru_cache(maxsize=1024)
+def tz_offset(time_zone: str, hour: int = 0) -> int:
+    """Memoized utc offset of time zone at `hour` since epoch, DST aware."""
+    if not time_zone:
+        return 0
+    moment = datetime.fromtimestamp(hour * 3600, pytz.timezone(time_zone))
+    offset = moment.utcoffset()
+    return int(offset.total_seconds() / 3600) if offset else 0
+
+
+def to_address(ipaddr: str, res: City) -> Address:
+    """Convert geoip2 city model into Address."""
     time_zone = res.location.time_zone
-    offset = utc_offset(time_zone) if time_zone else 0
-    latitude = res.location.latitude
-    longitude = res.location.longitude
+    offset = tz_offset(time_zone, int(time.time() // 3600)) if time_zone else 0
     coordinate = (
-        latitude or 0.0,
-        longitude or 0.0,
+        res.location.latitude or 0.0,
+        res.location.longitude or 0.0,
     )
     return Address(
         ipaddr=ipaddr,
-        country=country or "",
-        state=state or "",
-        city=city or "",
-        postal=postal or "",
+        country=res.country.iso_code or "",
+        state=res.subdivisions.most_specific.name or "",
+        city=res.city.name or "",
+        postal=res.postal.code or "",
         coordinate=coordinate,
         time_zone=time_zone or "",
         street="",
@@ -45,6 +73,213 @@ def geoip(ipaddr: str, file_geo: Path) -> Address:
     )
 
 
+class GeoResolver:
+    """GeoIP Resolver keeps one mmap reader open, with LRU lookup cache.
+
+    IPv4 address cached by network of `prefix` bits, eg: 24 shares one
+    lookup among a /24 block, IPv6 address always cached by itself.
+    """
+
+    def __init__(
+        self,
+        file_geo: Path,
+        cache_size: int = 65536,
+        prefix: int = 32,
+        mode: int = MODE_AUTO,
+    ) -> None:
+        """Init GeoResolver.
+
+        Parameters:
+            :cache_size:int, max number of cached lookups, 0 for no cache
+            :prefix:int, bits of IPv4 network sharing cached lookup
+            :mode:int, MODE_AUTO mmaps file by C extension if installed,
+                else by pure python MODE_MMAP
+        """
+        self.file_geo = file_geo
+        self.cache_size = cache_size
+        self.prefix = prefix
+
+        self.reader = Reader(str(file_geo), mode=mode)
+        self.cache: OrderedDict[str, Address] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self) -> "GeoResolver":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close reader and clear cache."""
+        self.reader.close()
+        self.cache.clear()
+
+    def to_key(self, ipaddr: str) -> str:
+        """Get cache key of ip address by `prefix`."""
+        if self.prefix >= 32 or ":" in ipaddr:
+            return ipaddr
+        return str(int(IPv4Address(ipaddr)) >> (32 - self.prefix))
+
+    def resolve(self, ipaddr: str, strict: bool = True) -> Address:
+        """Get Address of ip address.
+
+        Raise AddressNotFoundError for unknown or ValueError for invalid ip
+        address, return Address with only `ipaddr` if not `strict`.
+        """
+        if not strict:
+            try:
+                return self.resolve(ipaddr)
+            except (AddressNotFoundError, ValueError):
+                return Address(ipaddr, "", "", "", "", "", (0.0, 0.0), "", 0)
+
+        key = self.to_key(ipaddr)
+        with self.lock:
+            address = self.cache.get(key)
+            if address is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return replace(address, ipaddr=ipaddr)
+
+        address = to_address(ipaddr, self.reader.city(ipaddr))
+        if self.cache_size:
+            with self.lock:
+                self.misses += 1
+                self.cache[key] = address
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return replace(address)
+
+
+_RESOLVERS: dict[Path, GeoResolver] = {}
+_RESOLVERS_LOCK = threading.Lock()
+
+
+def resolver(file_geo: Path) -> GeoResolver:
+    """Get shared GeoResolver of database file, open if not exists."""
+    with _RESOLVERS_LOCK:
+        app = _RESOLVERS.get(file_geo)
+        if app is None:
+            app = _RESOLVERS[file_geo] = GeoResolver(file_geo=file_geo)
+        return app
+
+
+def close_resolvers() -> None:
+    """Close shared GeoResolvers, eg: before database file updated."""
+    with _RESOLVERS_LOCK:
+        for app in _RESOLVERS.values():
+            app.close()
+        _RESOLVERS.clear()
+
+
+def geoip(ipaddr: str, file_geo: Path) -> Address:
+    """maxmind geoip2 database connection for ip address parser"""
+    return resolver(file_geo).resolve(ipaddr)
+
+
+def to_row(address: Address) -> dict:
+    """Convert Address into TableAddress row."""
+    row = asdict(address)
+    row["latitude"], row["longitude"] = row.pop("coordinate")
+    return row
+
+
+WORKER: dict[str, GeoResolver] = {}
+
+
+def init_worker(file_geo: Path, prefix: int) -> None:
+    """Open GeoResolver for current worker process."""
+    WORKER["resolver"] = GeoResolver(file_geo=file_geo, prefix=prefix)
+
+
+def resolve_chunk(ipaddrs: list[str]) -> list[Address]:
+    """Resolve chunk of ip addresses in worker process."""
+    resolver_ = WORKER["resolver"]
+    return [resolver_.resolve(ipaddr, strict=False) for ipaddr in ipaddrs]
+
+
+def unique(ipaddrs: Iterable[str]) -> Iterator[str]:
+    """Yield ip addresses once, in order of first seen."""
+    seen: set[str] = set()
+    for ipaddr in ipaddrs:
+        if ipaddr not in seen:
+            seen.add(ipaddr)
+            yield ipaddr
+
+
+def geoip_many(
+    ipaddrs: Iterable[str],
+    file_geo: Path,
+    workers: int = 0,
+    chunk_size: int = 1000,
+    ordered: bool = True,
+    prefix: int = 32,
+) -> Iterator[Address]:
+    """Geolocate ip addresses by worker processes, each with own mmap reader.
+
+    Duplicated ip addresses resolved once, unknown or invalid ip address got
+    Address with only `ipaddr`. Results streamed in order of input, or in
+    order of completion if not `ordered`.
+
+    Parameters:
+        :workers:int, number of worker processes, 0 for cpu count
+        :chunk_size:int, number of ip addresses for each task
+        :prefix:int, bits of IPv4 network sharing cached lookup in worker
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = unique(ipaddrs)
+    chunks = iter(lambda: list(islice(pending, chunk_size)), [])
+    running: deque[Future] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(file_geo, prefix)
+    ) as executor:
+        for chunk in chunks:
+            running.append(executor.submit(resolve_chunk, chunk))
+            if len(running) >= workers * 2:
+                yield from collect(running, ordered)
+        while running:
+            yield from collect(running, ordered)
+
+
+def collect(running: deque[Future], ordered: bool) -> Iterator[Address]:
+    """Pop first or any finished future from running, yield its results."""
+    if ordered:
+        yield from running.popleft().result()
+        return
+    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+    for future in finished:
+        running.remove(future)
+        yield from future.result()
+
+
+def geoip_dump(
+    ipaddrs: Iterable[str],
+    file_geo: Path,
+    file_out: Optional[Path] = None,
+    database: Optional[Database] = None,
+    batch_size: int = 10000,
+    **kwargs: int,
+) -> int:
+    """Geolocate ip addresses into JSONL file and/or TableAddress by batch.
+
+    Return number of Address written, `kwargs` passed to geoip_many.
+    """
+    total = 0
+    results = geoip_many(ipaddrs, file_geo, ordered=False, **kwargs)
+    with ExitStack() as stack:
+        file = stack.enter_context(open(file_out, "wb")) if file_out else None
+        for batch in iter(lambda: list(islice(results, batch_size)), []):
+            if file:
+                opt = orjson.OPT_APPEND_NEWLINE
+                file.write(b"".join(orjson.dumps(x, option=opt) for x in batch))
+            if database:
+                rows = [to_row(address) for address in batch]
+                database.add_bulk(TableAddress, rows)
+            total += len(batch)
+    return total
+
+
 class TestGeoip:
     """TestCase for geoip."""
 
@@ -53,6 +288,23 @@ class TestGeoip:
     dir_app = Path(__file__).parent
     file_geo = DIR_DEBUG.parent / "data" / "GeoLite2-City.mmdb"
 
+    def setup_method(self) -> None:
+        """Skip tests if GeoLite2 database not downloaded."""
+        if not self.file_geo.is_file():
+            import pytest  # pylint: disable=import-outside-toplevel
+
+            pytest.skip(f"geoip database not found: {self.file_geo}")
+
+    @staticmethod
+    def to_ips(number: int, blocks: int = 256) -> list[str]:
+        """Generate random IPv4 addresses inside `blocks` of /24 networks."""
+        rng = random.Random(0)
+        nets = [
+            f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}"
+            for _ in range(blocks)
+        ]
+        return [f"{rng.choice(nets)}.{rng.randint(1, 254)}" for _ in range(number)]
+
     def test_geoip(self) -> None:
         """Test geoip."""
         print(self.file_geo.absolute())
@@ -62,6 +314,119 @@ class TestGeoip:
         assert address.country
         assert address.coordinate[0] and address.coordinate[1]
         assert address.time_zone
+        assert resolver(self.file_geo) is resolver(self.file_geo)
+        close_resolvers()
+        assert geoip(ipaddr=self.ip_addr, file_geo=self.file_geo) == address
+        close_resolvers()
+
+        # offset follows DST by hour, New York -5 in January, -4 in July
+        assert tz_offset("America/New_York", 0) == -5
+        assert tz_offset("America/New_York", 181 * 24) == -4
+        assert tz_offset("") == 0
+
+    def test_resolver(self) -> None:
+        """Test GeoResolver same as fresh reader, cache by ip and by /24."""
+        res = Reader(str(self.file_geo)).city(self.ip_addr)
+        expected = to_address(self.ip_addr, res)
+        with GeoResolver(self.file_geo, cache_size=2) as app:
+            for _ in range(3):
+                address = app.resolve(self.ip_addr)
+                assert address == expected
+            address.city = "changed"
+            assert app.resolve(self.ip_addr) == expected
+            assert (app.hits, app.misses) == (3, 1)
+            for ipaddr in ("1.1.1.1", "2.2.2.2", self.ip_addr):
+                app.resolve(ipaddr)
+            assert len(app.cache) == 2 and app.misses == 4
+
+        with GeoResolver(self.file_geo, prefix=24) as app:
+            block = self.ip_addr.rsplit(".", 1)[0]
+            for last in range(1, 11):
+                address = app.resolve(f"{block}.{last}")
+                assert address.ipaddr == f"{block}.{last}"
+                assert address.city == expected.city
+            assert (app.hits, app.misses) == (9, 1)
+
+    def test_geoip_many(self) -> None:
+        """Test geoip_many dedupe, order, unknown ip and dump."""
+        ips = self.to_ips(5000) + ["0.0.0.1", "invalid", self.ip_addr]
+        with GeoResolver(self.file_geo) as app:
+            expected = [app.resolve(x, strict=False) for x in unique(ips * 2)]
+        assert expected[-3].country == "" and expected[-2].country == ""
+
+        results = list(geoip_many(ips * 2, self.file_geo, workers=2, chunk_size=64))
+        assert results == expected
+        unordered = geoip_many(ips, self.file_geo, workers=2, ordered=False, prefix=24)
+        assert sorted(x.ipaddr for x in unordered) == sorted(set(ips))
+
+        file_out = DIR_DEBUG / "geoip.jsonl"
+        db_file = DIR_DEBUG / "geoip.sqlite"
+        IO.file_del(db_file)
+        orm = Sqlite(db_file=db_file)
+        orm.create_tables()
+        total = geoip_dump(
+            ips, self.file_geo, file_out, orm, batch_size=1000, workers=2
+        )
+        assert total == len(expected)
+        lines = file_out.read_bytes().splitlines()
+        assert sorted(orjson.loads(x)["ipaddr"] for x in lines) == sorted(set(ips))
+        with orm.engine.connect() as conn:
+            query = select(func.count()).select_from(TableAddress.__table__)
+            count = conn.execute(query)
+            assert count.scalar() == total
+        orm.exit()
+        IO.file_del(file_out)
+        IO.file_del(db_file)
+
+    def test_bench_many(self, number: int = 100000) -> None:
+        """Benchmark geoip_many with duplicated ip addresses."""
+        ips = self.to_ips(number // 2) * 2
+        for workers in (1, 2, 4):
+            start = time.perf_counter()
+            total = sum(1 for _ in geoip_many(ips, self.file_geo, workers=workers))
+            speed = number / (time.perf_counter() - start)
+            print(f"<{workers}>workers: {total} unique, {speed:.0f}/s")
+
+    def test_bench_resolver(self, number: int = 20000) -> None:
+        """Benchmark lookups/sec of fresh reader, mmap reader and cache."""
+        ips = self.to_ips(number)
+        start = time.perf_counter()
+        for ipaddr in ips[: number // 20]:
+            res = Reader(str(self.file_geo)).city(ipaddr)
+            time_zone = res.location.time_zone or ""
+            Address(
+                ipaddr=ipaddr,
+                country=res.country.iso_code or "",
+                state=res.subdivisions.most_specific.name or "",
+                city=res.city.name or "",
+                postal=res.postal.code or "",
+                coordinate=(
+                    res.location.latitude or 0.0,
+                    res.location.longitude or 0.0,
+                ),
+                time_zone=time_zone,
+                street="",
+                utc_offset=utc_offset(time_zone) if time_zone else 0,
+            )
+        fresh = number // 20 / (time.perf_counter() - start)
+
+        result = {}
+        for name, cache_size, prefix, mode in (
+            ("mmap python", 0, 32, MODE_MMAP),
+            ("mmap", 0, 32, MODE_AUTO),
+            ("cache /32", 65536, 32, MODE_AUTO),
+            ("cache /24", 65536, 24, MODE_AUTO),
+        ):
+            with GeoResolver(self.file_geo, cache_size, prefix, mode) as app:
+                start = time.perf_counter()
+                for ipaddr in ips:
+                    app.resolve(ipaddr)
+                result[name] = number / (time.perf_counter() - start)
+                assert app.hits + app.misses == (number if cache_size else 0)
+
+        print(f"fresh reader: {fresh:.0f}/s")
+        for name, speed in result.items():
+            print(f"{name}: {speed:.0f}/s")
 
 
 if __name__ == "__main__":
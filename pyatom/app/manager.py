@@ -0,0 +1,378 @@
+"""
+    Concurrent Download Queue Manager on top of Downloader.
+"""
+
+import os
+import shutil
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional, Union
+from urllib.parse import urlparse
+
+from pyatom.app.downloader import ContentStore, Downloader, Progress
+from pyatom.base.io import IO
+from pyatom.base.log import Logger, init_logger
+from pyatom.config import DIR_DEBUG
+
+
+__all__ = (
+    "Task",
+    "Stats",
+    "DownloadManager",
+)
+
+
+@dataclass
+class Task:
+    """Download task, status in `pending`, `done`, `skipped`, `failed`."""
+
+    url: str
+    file_out: str
+    size: int = 0
+    sha256: str = ""
+    status: str = "pending"
+    attempts: int = 0
+    error: str = ""
+    copies: list[str] = field(default_factory=list)
+
+    @property
+    def finished(self) -> bool:
+        """Check if task done or skipped."""
+        return self.status in ("done", "skipped")
+
+    @property
+    def host(self) -> str:
+        """Get host of url for per-host concurrency."""
+        return urlparse(self.url).netloc
+
+
+@dataclass
+class Stats:
+    """Aggregate stats of download queue."""
+
+    total: int = 0
+    done: int = 0
+    skipped: int = 0
+    failed: int = 0
+    duplicated: int = 0
+    size: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Get downloaded bytes per second."""
+        return self.size / self.elapsed if self.elapsed else 0.0
+
+
+class DownloadManager:
+    """Concurrent Download Queue Manager.
+
+    Run tasks with bounded global and per-host concurrency. Identical url
+    downloaded once then copied to other destinations. Files present with
+    matching size or sha256 skipped. Queue state saved into `file_state`, a
+    restarted manager picks up where it left off.
+    """
+
+    def __init__(
+        self,
+        user_agent: str,
+        proxy_url: str,
+        logger: Logger,
+        file_state: Optional[Path] = None,
+        workers: int = 8,
+        per_host: int = 2,
+        retry: int = 2,
+        progress: bool = True,
+        save_interval: float = 1.0,
+        store: Optional[ContentStore] = None,
+    ) -> None:
+        """Init download manager, load queue state if `file_state` exists.
+
+        Parameters:
+            :workers:int, max number of concurrent downloads
+            :per_host:int, max number of concurrent downloads for one host
+            :retry:int, retry times for failed task
+            :save_interval:float, min seconds between state saving
+            :store:ContentStore, download through content store if provided
+        """
+        self.user_agent = user_agent
+        self.proxy_url = proxy_url
+        self.logger = logger
+        self.file_state = file_state
+        self.workers = workers
+        self.per_host = per_host
+        self.retry = retry
+        self.progress = progress
+        self.save_interval = save_interval
+        self.store = store
+
+        self.tasks: dict[str, Task] = {}
+        self.seen: set[str] = set()
+        self.stats = Stats()
+        self.saved = 0.0
+        self.local = threading.local()
+
+        self.load()
+
+    def load(self) -> int:
+        """Load queue state from file, return number of tasks loaded."""
+        if not (self.file_state and self.file_state.is_file()):
+            return 0
+        try:
+            items = IO.load_dict(self.file_state).get("tasks") or []
+        except ValueError:
+            self.logger.error("broken state file: %s", self.file_state)
+            return 0
+        for item in items:
+            task = Task(**item)
+            self.tasks[task.url] = task
+        return len(items)
+
+    def save(self, force: bool = True) -> None:
+        """Save queue state by replacing, at most every `save_interval`."""
+        if not self.file_state:
+            return
+        now = time.monotonic()
+        if not force and now - self.saved < self.save_interval:
+            return
+        file_tmp = Path(f"{self.file_state}.tmp")
+        IO.save_dict(file_tmp, {"tasks": [asdict(t) for t in self.tasks.values()]})
+        file_tmp.replace(self.file_state)
+        self.saved = now
+
+    def add(
+        self,
+        url: str,
+        file_out: Union[Path, str],
+        size: int = 0,
+        sha256: str = "",
+    ) -> bool:
+        """Add download task, return False if url duplicated.
+
+        Parameters:
+            :size:int, expected file size, query remote size if zero
+            :sha256:str, expected hex digest, verified after downloading
+        """
+        file_out = str(file_out)
+        task = self.tasks.get(url)
+        if task is None:
+            self.tasks[url] = Task(url=url, file_out=file_out, size=size, sha256=sha256)
+        elif file_out != task.file_out and file_out not in task.copies:
+            # new destination of known url, also for task loaded from state
+            task.copies.append(file_out)
+            if task.finished:
+                task.status = "pending"
+        if url in self.seen:
+            self.stats.duplicated += 1
+            return False
+        self.seen.add(url)
+        return True
+
+    def extend(self, items: Iterable[tuple[str, Union[Path, str]]]) -> int:
+        """Add pairs of (url, file_out), return number of unique urls added."""
+        return sum(self.add(url, file_out) for url, file_out in items)
+
+    def _downloader(self) -> Downloader:
+        """Get headless Downloader for current worker thread."""
+        downloader = getattr(self.local, "downloader", None)
+        if downloader is None:
+            downloader = Downloader(
+                user_agent=self.user_agent,
+                proxy_url=self.proxy_url,
+                logger=self.logger,
+                progress=False,
+                store=self.store,
+            )
+            self.local.downloader = downloader
+        return downloader
+
+    def _present(self, downloader: Downloader, task: Task) -> bool:
+        """Check if file present with matching sha256 or size."""
+        if not os.path.isfile(task.file_out):
+            return False
+        if task.sha256:
+            return Downloader.file_sha256(task.file_out) == task.sha256
+        size = task.size or downloader.remote_size(task.url)
+        return size > 0 and os.stat(task.file_out).st_size == size
+
+    def _process(self, task: Task) -> str:
+        """Download task in worker thread, return status."""
+        downloader = self._downloader()
+        status = "skipped"
+        if not self._present(downloader, task):
+            if not downloader.download(file_url=task.url, file_out=task.file_out):
+                raise IOError(f"download failed: {task.url}")
+            if task.sha256 and Downloader.file_sha256(task.file_out) != task.sha256:
+                IO.file_del(task.file_out)
+                raise IOError(f"sha256 mismatch: {task.url}")
+            status = "done"
+
+        for file_copy in task.copies:
+            IO.dir_create(Path(file_copy).parent)
+            shutil.copyfile(task.file_out, file_copy)
+        return status
+
+    def _finish(self, task: Task, future: Future) -> bool:
+        """Update task by finished future, return False if should retry."""
+        try:
+            task.status = future.result()
+            task.error = ""
+        except Downloader.errors as err:
+            task.attempts += 1
+            task.error = str(err)
+            self.logger.error("[%d]%s", task.attempts, err)
+            if task.attempts <= self.retry:
+                return False
+            task.status = "failed"
+
+        if task.status == "done":
+            self.stats.done += 1
+            self.stats.size += os.stat(task.file_out).st_size
+        elif task.status == "skipped":
+            self.stats.skipped += 1
+        else:
+            self.stats.failed += 1
+        return True
+
+    def run(self) -> Stats:
+        """Run unfinished tasks, return aggregate stats."""
+        start = time.monotonic()
+        pending: dict[str, deque] = defaultdict(deque)
+        for task in self.tasks.values():
+            if not task.finished:
+                task.attempts = 0
+                pending[task.host].append(task)
+
+        self.stats.total = len(self.tasks)
+        progress = Progress(
+            total=sum(len(tasks) for tasks in pending.values()),
+            enable=self.progress,
+            unit="file",
+        )
+        running: dict[Future, Task] = {}
+        hosts: Counter = Counter()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                for host in list(pending):
+                    tasks = pending[host]
+                    while (
+                        tasks
+                        and hosts[host] < self.per_host
+                        and len(running) < self.workers
+                    ):
+                        task = tasks.popleft()
+                        hosts[host] += 1
+                        running[executor.submit(self._process, task)] = task
+                    if not tasks:
+                        del pending[host]
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    task = running.pop(future)
+                    hosts[task.host] -= 1
+                    if self._finish(task, future):
+                        progress.update(1)
+                    else:
+                        pending[task.host].append(task)
+                self.save(force=False)
+
+        progress.close()
+        self.save()
+        self.stats.elapsed += time.monotonic() - start
+        self.logger.info(
+            "<%d>done, <%d>skipped, <%d>failed, %.1fMB/s",
+            self.stats.done,
+            self.stats.skipped,
+            self.stats.failed,
+            self.stats.throughput / 1024 / 1024,
+        )
+        return self.stats
+
+
+class TestDownloadManager:
+    """Test DownloadManager."""
+
+    logger = init_logger(name="test")
+
+    def to_app(self, file_state: Optional[Path] = None) -> DownloadManager:
+        """Get DownloadManager without proxy for local server."""
+        return DownloadManager(
+            user_agent="",
+            proxy_url="",
+            logger=self.logger,
+            file_state=file_state,
+            workers=4,
+            per_host=2,
+            retry=1,
+            progress=False,
+        )
+
+    def test_manager(self) -> None:
+        """Test per-host concurrency, dedupe, skip and restart by state."""
+        # pylint: disable=import-outside-toplevel
+        from pyatom.app.testing import RangeServer
+
+        data = os.urandom(256 * 1024)
+        servers = [RangeServer(data=data, latency=0.05) for _ in range(2)]
+        dir_out = DIR_DEBUG / "manager"
+        file_state = DIR_DEBUG / "manager.json"
+        IO.dir_del(dir_out)
+        IO.file_del(file_state)
+
+        items = [
+            (f"{server.url}?n={index}", dir_out / f"{number}-{index}.bin")
+            for number, server in enumerate(servers)
+            for index in range(6)
+        ]
+        app = self.to_app(file_state)
+        assert app.extend(items) == 12
+        assert not app.add(items[0][0], dir_out / "copy.bin")
+        assert not app.add(items[0][0], items[0][1])
+        app.add("http://127.0.0.1:1/closed.bin", dir_out / "closed.bin")
+
+        stats = app.run()
+        assert (stats.total, stats.done, stats.failed) == (13, 12, 1)
+        assert stats.duplicated == 2 and stats.size == 12 * len(data)
+        assert all(server.peak <= 2 for server in servers)
+        assert sum(server.requests for server in servers) == 12
+        for _, file_out in items:
+            assert Path(file_out).read_bytes() == data
+        assert (dir_out / "copy.bin").read_bytes() == data
+
+        # restart by state, finished tasks never request again
+        app = self.to_app(file_state)
+        assert app.extend(items) == 12
+        stats = app.run()
+        assert (stats.done, stats.skipped, stats.failed) == (0, 0, 1)
+        assert sum(server.requests for server in servers) == 12
+
+        # new destination for url loaded from state copied without request
+        app = self.to_app(file_state)
+        assert app.add(items[0][0], dir_out / "restart.bin")
+        stats = app.run()
+        assert (stats.done, stats.skipped, stats.failed) == (0, 1, 1)
+        assert (dir_out / "restart.bin").read_bytes() == data
+        assert sum(server.requests for server in servers) == 12
+
+        # no state, present files skipped by size and sha256
+        digest = Downloader.file_sha256(items[0][1])
+        app = self.to_app()
+        app.add(items[0][0], items[0][1], sha256=digest)
+        app.extend(items[1:])
+        stats = app.run()
+        assert (stats.done, stats.skipped) == (0, 12)
+        assert sum(server.requests for server in servers) == 12
+
+        for server in servers:
+            server.shutdown()
+        IO.dir_del(dir_out)
+        IO.file_del(file_state)
+
+
+if __name__ == "__main__":
+    TestDownloadManager()
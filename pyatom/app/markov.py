@@ -2,72 +2,344 @@
 
 import random
 import string
+import time
+import tracemalloc
 from collections import defaultdict
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Literal, Optional, Union
 
 import regex as re
 import numpy as np
+import orjson
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pyatom.base.io import IO
+from pyatom.config import DIR_DEBUG
 
 
 class Markov:
     """
     Markov Chain Text Generator
+
+    State is the last `order` words, transitions compiled into CSR arrays:
+        :vocab: array of words, word id is index
+        :states: array of word ids for each state, one row per state
+        :indptr: transitions of state `i` at `indptr[i]:indptr[i + 1]`
+        :indices: next word ids
+        :targets: next state ids
+        :counts: transition counts
+        :cumulative: row id plus cumulative probability within row, so one
+            binary search over all rows picks next word for any row
     """
 
-    def __init__(self, text: str) -> None:
-        """Init markov text generator."""
+    pattern = re.compile(r"[a-zA-Z]+", re.I)
+    arrays = ("vocab", "states", "indptr", "indices", "targets", "counts")
+    derived = ("cumulative", "starts")
+
+    def __init__(
+        self, text: str = "", order: int = 1, seed: Optional[int] = None
+    ) -> None:
+        """Init markov text generator, `seed` for reproducible generating."""
         self.text = text
+        self.order = order
+        self.rng = np.random.default_rng(seed)
 
-        pattern = re.compile(r"[a-zA-Z]+", re.I)
-        tokens = [word for word in pattern.findall(text) if word != ""]
+        self.vocab = np.array([], dtype=str)
+        self.states = np.zeros((0, order), dtype=np.int32)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.targets = np.zeros(0, dtype=np.int32)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.cumulative = np.zeros(0, dtype=np.float64)
+        self.starts = np.zeros(0, dtype=np.int64)
+        self._index: Optional[dict[str, int]] = None
+        self._graph: Optional[dict[str, dict[str, int]]] = None
+        if text:
+            self.update([text])
 
-        self.markov_graph: defaultdict = defaultdict(lambda: defaultdict(int))
+    @classmethod
+    def train(
+        cls,
+        documents: Iterable[str],
+        order: int = 1,
+        seed: Optional[int] = None,
+        batch_size: int = 10000,
+    ) -> "Markov":
+        """Train model from iterable of documents, streaming by batch."""
+        app = cls(order=order, seed=seed)
+        app.update(documents, batch_size=batch_size)
+        return app
+
+    @staticmethod
+    def documents(file_name: Union[str, Path], key: str = "text") -> Iterator[str]:
+        """Stream documents from text file by line, or from `.jsonl` by key."""
+        with open(file_name, "rb") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                if str(file_name).endswith(".jsonl"):
+                    yield str(orjson.loads(line).get(key) or "")
+                else:
+                    yield line.decode("utf8")
+
+    @property
+    def index(self) -> dict[str, int]:
+        """Get word id by word, built on first use."""
+        if self._index is None:
+            self._index = {str(word): index for index, word in enumerate(self.vocab)}
+        return self._index
+
+    def to_keys(self) -> np.ndarray:
+        """Expand CSR arrays into transition rows of (state words, next word)."""
+        rows = np.repeat(np.arange(len(self.states)), np.diff(self.indptr))
+        return np.column_stack((self.states[rows], self.indices))
+
+    def update(self, documents: Iterable[str], batch_size: int = 10000) -> int:
+        """Update model incrementally from documents, return number of words.
+
+        Transitions never cross documents, new words appended to vocab so
+        existing word ids stay unchanged. Word index dropped when done,
+        rebuilt from vocab on first use.
+        """
+        index, total = self.index, 0
+        batch: list[np.ndarray] = []
+        for document in documents:
+            ids = [
+                index.setdefault(word.lower(), len(index))
+                for word in self.pattern.findall(document)
+            ]
+            total += len(ids)
+            if len(ids) > self.order:
+                batch.append(sliding_window_view(np.array(ids), self.order + 1))
+            if len(batch) >= batch_size:
+                self.merge(batch)
+                batch = []
+        self.merge(batch)
+        self._index = None
+        return total
+
+    def merge(self, batch: list[np.ndarray]) -> None:
+        """Merge batch of transition rows into compiled arrays."""
+        words = list(islice(self.index, len(self.vocab), None))
+        if words:
+            self.vocab = np.concatenate((self.vocab, np.array(words, dtype=str)))
+        if not batch:
+            return
+
+        keys = np.concatenate([self.to_keys()] + batch).astype(np.int32)
+        counts = np.concatenate(
+            (self.counts, np.ones(len(keys) - len(self.counts), dtype=np.int64))
+        )
+        keys, inverse = self.unique_rows(keys, len(self.vocab))
+        counts = np.bincount(inverse, weights=counts)
+        self.compile(keys, counts.astype(np.int64))
+
+    @staticmethod
+    def unique_rows(rows: np.ndarray, radix: int) -> tuple[np.ndarray, np.ndarray]:
+        """Get sorted unique rows and inverse, rows packed into int64 if fit."""
+        if max(radix, 1) ** rows.shape[1] >= 1 << 63:
+            unique, inverse = np.unique(rows, axis=0, return_inverse=True)
+            return unique.astype(np.int32), inverse.reshape(-1)
+
+        codes = np.zeros(len(rows), dtype=np.int64)
+        for column in rows.T:
+            codes = codes * radix + column
+        codes, inverse = np.unique(codes, return_inverse=True)
+        unique = np.empty((len(codes), rows.shape[1]), dtype=np.int32)
+        for pos in range(rows.shape[1] - 1, -1, -1):
+            codes, unique[:, pos] = np.divmod(codes, radix)
+        return unique, inverse
+
+    def compile(self, keys: np.ndarray, counts: np.ndarray) -> None:
+        """Compile sorted unique transition rows into CSR arrays."""
+        size = len(keys)
+        grams = np.concatenate((keys[:, :-1], keys[:, 1:]))
+        self.states, inverse = self.unique_rows(grams, len(self.vocab))
+        inverse = inverse.astype(np.int32)
+
+        rows = inverse[:size]
+        self.targets = inverse[size:]
+        self.indices = keys[:, -1].astype(np.int32)
+        self.counts = counts
+        self.indptr = np.zeros(len(self.states) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(self.states)), out=self.indptr[1:])
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Build cumulative probabilities and start states from counts."""
+        self._graph = None
+        rows = np.repeat(np.arange(len(self.states)), np.diff(self.indptr))
+        total = np.concatenate(([0], np.cumsum(self.counts)))
+        base = total[self.indptr[:-1]]
+        row_total = total[self.indptr[1:]] - base
+        self.cumulative = rows + (total[1:] - base[rows]) / row_total[rows]
+        self.starts = np.flatnonzero(row_total)
+
+    def save(self, file_name: Union[str, Path]) -> None:
+        """Save compiled model, `.npz` file or directory of `.npy` files.
+
+        Derived arrays saved too, so loaded model never rebuild them.
+        """
+        file_name = Path(file_name)
+        data = {name: getattr(self, name) for name in self.arrays + self.derived}
+        if file_name.suffix == ".npz":
+            np.savez(file_name, **data)
+            return
+        file_name.mkdir(parents=True, exist_ok=True)
+        for name, value in data.items():
+            np.save(file_name / f"{name}.npy", value)
+
+    @classmethod
+    def load(
+        cls, file_name: Union[str, Path], mmap: bool = True, seed: Optional[int] = None
+    ) -> "Markov":
+        """Load compiled model, directory of `.npy` files memory mapped.
+
+        Derived arrays rebuilt only if missing from file, eg: older model.
+        """
+        file_name = Path(file_name)
+        names = cls.arrays + cls.derived
+        if file_name.suffix == ".npz":
+            with np.load(file_name) as file:
+                data = {name: file[name] for name in names if name in file}
+        else:
+            mode: Optional[Literal["r"]] = "r" if mmap else None
+            data = {
+                name: np.load(file_name / f"{name}.npy", mmap_mode=mode)
+                for name in names
+                if (file_name / f"{name}.npy").is_file()
+            }
+
+        app = cls(order=data["states"].shape[1], seed=seed)
+        for name, value in data.items():
+            setattr(app, name, value)
+        if any(name not in data for name in cls.derived):
+            app.refresh()
+        return app
+
+    @property
+    def markov_graph(self) -> dict[str, dict[str, int]]:
+        """Get transitions as dict of dict, for compatibility only.
+
+        Built on first use, rebuilt after model updated, never modify it.
+        """
+        if self._graph is None:
+            self._graph = {
+                " ".join(self.vocab[self.states[row]]): {
+                    str(self.vocab[self.indices[pos]]): int(self.counts[pos])
+                    for pos in range(self.indptr[row], self.indptr[row + 1])
+                }
+                for row in self.starts
+            }
+        return self._graph
+
+    def to_state(self, start_node: str) -> int:
+        """Get state id by last `order` words of `start_node`, -1 if unknown."""
+        words = [word.lower() for word in self.pattern.findall(start_node)]
+        ids = [self.index.get(word, -1) for word in words[-self.order :]]
+        if len(ids) < self.order or min(ids) < 0:
+            return -1
+        found = np.flatnonzero((self.states == ids).all(axis=1))
+        return int(found[0]) if found.size else -1
+
+    def next_pos(self, state: int, rnd: float) -> int:
+        """Pick transition by uniform random number, -1 if dead end."""
+        if self.indptr[state] == self.indptr[state + 1]:
+            return -1
+        return int(np.searchsorted(self.cumulative, state + rnd, side="right"))
+
+    def walk(self, distance: int = 5, start_node: str = "") -> Iterator[str]:
+        """Yield words from a randomly weighted walk, stop at dead end."""
+        if distance <= 0:
+            return
+
+        # If not given, pick a start node at random.
+        if start_node:
+            state = self.to_state(start_node)
+        else:
+            state = self.rng.choice(self.starts) if self.starts.size else -1
+
+        for rnd in self.rng.random(distance) if state >= 0 else ():
+            pos = self.next_pos(state, rnd)
+            if pos < 0:
+                return
+            state = self.targets[pos]
+            yield str(self.vocab[self.indices[pos]])
+
+    def walk_graph(
+        self, graph: dict, distance: int = 5, start_node: str = ""
+    ) -> list[str]:
+        """Returns a list of words from a randomly weighted walk.
+
+        Start node picked from `graph` keys if not given, walk on compiled
+        transitions.
+        """
+        if not start_node and graph:
+            start_node = str(self.rng.choice(list(graph)))
+        return list(self.walk(distance=distance, start_node=start_node))
+
+    def generate(self, distance: int = 15) -> str:
+        """generate words"""
+        if not self.starts.size:
+            raise ValueError("no transition to generate words")
+        return " ".join(self.walk(distance=distance))
 
+    def generate_many(
+        self, number: int, distance: int = 15, seed: Optional[int] = None
+    ) -> list[str]:
+        """Generate `number` sentences in one vectorized batch.
+
+        All random numbers drawn up front, walk stops at dead end, so same
+        `seed` always gives same sentences.
+        """
+        if not self.starts.size:
+            raise ValueError("no transition to generate words")
+        rng = self.rng if seed is None else np.random.default_rng(seed)
+        states = rng.choice(self.starts, size=number)
+        draws = rng.random((distance, number))
+
+        words = np.full((distance, number), -1, dtype=np.int64)
+        alive = np.ones(number, dtype=bool)
+        last = len(self.indices) - 1
+        for step in range(distance):
+            alive &= self.indptr[states] != self.indptr[states + 1]
+            pos = np.searchsorted(self.cumulative, states + draws[step], side="right")
+            pos = np.minimum(pos, last)
+            words[step] = np.where(alive, self.indices[pos], -1)
+            states = np.where(alive, self.targets[pos], states)
+
+        return [" ".join(self.vocab[column[column >= 0]]) for column in words.T]
+
+
+class LegacyMarkov:
+    """Markov by dict of dict before compiled arrays, for benchmark only."""
+
+    def __init__(self, text: str) -> None:
+        """Init markov graph."""
+        tokens = Markov.pattern.findall(text)
+        self.markov_graph: defaultdict = defaultdict(lambda: defaultdict(int))
         last_word = tokens[0].lower()
         for word in tokens[1:]:
             word = word.lower()
             self.markov_graph[last_word][word] += 1
             last_word = word
 
-        # limit = 3
-        # for first_word in ["by", "who", "the"]:
-        #     next_words = list(self.markov_graph[first_word].keys())[:limit]
-        #     for next_word in next_words:
-        #         print(first_word, next_word)
-
-    def walk_graph(
-        self, graph: dict, distance: int = 5, start_node: str = ""
-    ) -> list[str]:
+    def walk_graph(self, distance: int = 5, start_node: str = "") -> list[str]:
         """Returns a list of words from a randomly weighted walk."""
         if distance <= 0:
             return []
-
-        # If not given, pick a start node at random.
         if not start_node:
-            start_node = random.choice(list(graph.keys()))
-
+            start_node = random.choice(list(self.markov_graph.keys()))
         weights = np.array(
             list(self.markov_graph[start_node].values()), dtype=np.float64
         )
-        # Normalize word counts to sum to 1.
         weights /= weights.sum()
-
-        # Pick a destination using weighted distribution.
         choices = list(self.markov_graph[start_node].keys())
         if not choices:
             return []
-
         chosen_word = np.random.choice(choices, None, p=weights)
-
-        return [chosen_word] + self.walk_graph(
-            graph, distance=distance - 1, start_node=chosen_word
-        )
-
-    def generate(self, distance: int = 15) -> str:
-        """generate words"""
-        while True:
-            new_words = self.walk_graph(self.markov_graph, distance=distance)
-            if new_words:
-                return " ".join(new_words)
+        return [chosen_word] + self.walk_graph(distance - 1, chosen_word)
 
 
 class TestMarkov:
@@ -88,6 +360,15 @@ class TestMarkov:
             ]
         )
 
+    @staticmethod
+    def corpus(words: int = 200000, vocab: int = 5000) -> str:
+        """generate corpus with zipf distributed vocabulary"""
+        rng = np.random.default_rng(0)
+        letters = np.array(list(string.ascii_lowercase))
+        table = ["".join(rng.choice(letters, size=8)) for _ in range(vocab)]
+        ids = np.minimum(rng.zipf(1.2, size=words), vocab) - 1
+        return " ".join(table[index] for index in ids)
+
     def test_markov(self) -> None:
         """test markov generator"""
         number = 10
@@ -100,6 +381,152 @@ class TestMarkov:
             print(f"<{index}>[{num_words}] {text}")
             assert num_words > 0
 
+    def test_compiled(self) -> None:
+        """test compiled transitions same as dict of dict graph"""
+        text = self.corpus(words=20000, vocab=500)
+        app, legacy = Markov(text=text), LegacyMarkov(text=text)
+        assert app.markov_graph == legacy.markov_graph
+
+        row = app.to_state(next(iter(legacy.markov_graph)))
+        start, end = app.indptr[row], app.indptr[row + 1]
+        expected = app.counts[start:end] / app.counts[start:end].sum()
+        draws = [app.indices[app.next_pos(row, rnd)] for rnd in np.random.random(20000)]
+        freq = np.bincount(draws, minlength=len(app.vocab))
+        assert np.allclose(freq[app.indices[start:end]] / 20000, expected, atol=0.02)
+
+    def test_generate_many(self) -> None:
+        """test batch generating reproducible and stop at dead end"""
+        app = Markov(text=self.corpus(words=20000, vocab=500), seed=1)
+        first = app.generate_many(100, distance=20, seed=7)
+        assert first == app.generate_many(100, distance=20, seed=7)
+        assert first != app.generate_many(100, distance=20, seed=8)
+        assert all(len(text.split(" ")) == 20 for text in first)
+        assert Markov(text="", seed=2).starts.size == 0
+
+        app = Markov(text="alpha beta gamma alpha beta delta", seed=3)
+        texts = app.generate_many(50, distance=10, seed=0)
+        for text in texts:
+            assert text.endswith("delta") or len(text.split(" ")) == 10
+        assert any(len(text.split(" ")) < 10 for text in texts)
+        assert 0 < len(app.generate(distance=10).split(" ")) <= 10
+        assert app.walk_graph({}, distance=10, start_node="delta") == []
+        assert app.walk_graph({}, distance=10, start_node="missing") == []
+
+        app = Markov(text="ping pong " * 10, seed=4)
+        assert len(app.walk_graph({}, distance=5000)) == 5000
+
+    def test_train(self) -> None:
+        """test streaming training, higher order, update and persistence"""
+        file_bios = DIR_DEBUG.parent / "data" / "bios.txt"
+        lines = list(Markov.documents(file_bios))
+        app = Markov.train(lines, order=2, seed=0, batch_size=500)
+        assert app.states.shape[1] == 2 and app.starts.size
+        for text in app.generate_many(20, distance=10, seed=0):
+            words = text.split(" ")
+            for pos in range(2, len(words)):
+                assert " ".join(words[pos - 2 : pos + 1]) in " ".join(lines).lower()
+
+        # streaming in one pass or update by chunks gives same model
+        first = Markov.train(lines[:3000], order=2, batch_size=100)
+        first.update(lines[3000:])
+        assert first.vocab[: len(app.vocab)].tolist() == first.vocab.tolist()
+        assert sorted(first.markov_graph.items()) == sorted(app.markov_graph.items())
+
+        # transitions never cross documents, graph cached until update
+        small = Markov.train(["alpha beta", "gamma delta"])
+        graph = small.markov_graph
+        assert graph is small.markov_graph
+        assert graph == {"alpha": {"beta": 1}, "gamma": {"delta": 1}}
+        assert small.walk_graph(graph, distance=3) in (["beta"], ["delta"])
+        small.update(["alpha gamma"])
+        assert small.markov_graph is not graph
+        assert small.markov_graph["alpha"] == {"beta": 1, "gamma": 1}
+        assert Markov("alpha beta alpha gamma").markov_graph == {
+            "alpha": {"beta": 1, "gamma": 1},
+            "beta": {"alpha": 1},
+        }
+
+        rows = np.random.randint(0, 50, size=(1000, 3))
+        packed = Markov.unique_rows(rows, 50)
+        fallback = Markov.unique_rows(rows, 1 << 21)
+        assert all(np.array_equal(x, y) for x, y in zip(packed, fallback))
+
+        file_jsonl = DIR_DEBUG / "markov.jsonl"
+        file_jsonl.write_bytes(b"\n".join(orjson.dumps({"text": x}) for x in lines))
+        assert list(Markov.documents(file_jsonl)) == lines
+
+        expected = app.generate_many(20, distance=10, seed=1)
+        for file_model in (DIR_DEBUG / "markov.npz", DIR_DEBUG / "markov"):
+            app.save(file_model)
+            for mmap in (True, False):
+                loaded = Markov.load(file_model, mmap=mmap)
+                shared = mmap and file_model.suffix != ".npz"
+                assert isinstance(loaded.cumulative, np.memmap) is shared
+                assert loaded.generate_many(20, distance=10, seed=1) == expected
+                assert loaded.to_state("Proud food") == app.to_state("proud food")
+            loaded.update(["proud food ninja zebra"])
+            assert "zebra" in loaded.markov_graph["food ninja"]
+        IO.file_del(file_jsonl)
+        IO.file_del(DIR_DEBUG / "markov.npz")
+        IO.dir_del(DIR_DEBUG / "markov")
+
+    def test_bench_load(self) -> None:
+        """benchmark training from text vs loading compiled model"""
+        text = self.corpus(words=1000000, vocab=20000)
+        start = time.perf_counter()
+        app = Markov(text=text, order=2)
+        train = time.perf_counter() - start
+
+        dir_model = DIR_DEBUG / "markov"
+        app.save(dir_model)
+        start = time.perf_counter()
+        loaded = Markov.load(dir_model)
+        load = time.perf_counter() - start
+        print(f"train: {train:.2f}s, load: {load * 1000:.1f}ms")
+        assert loaded.generate_many(10, seed=0) == app.generate_many(10, seed=0)
+        IO.dir_del(dir_model)
+
+    def test_bench_generate(self, number: int = 5000, distance: int = 15) -> None:
+        """benchmark one by one generating vs batch generating"""
+        app = Markov(text=self.corpus(), seed=0)
+        start = time.perf_counter()
+        for _ in range(number):
+            app.generate(distance=distance)
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        texts = app.generate_many(number, distance=distance, seed=0)
+        batch = time.perf_counter() - start
+        print(
+            f"generate: {number / single:.0f}/s, "
+            f"generate_many: {number / batch:.0f}/s"
+        )
+        assert len(texts) == number
+
+    def test_bench_markov(self, number: int = 2000, distance: int = 15) -> None:
+        """benchmark dict of dict graph vs compiled CSR arrays"""
+        text = self.corpus()
+        for name, cls in (("legacy", LegacyMarkov), ("compiled", Markov)):
+            tracemalloc.start()
+            start = time.perf_counter()
+            app = cls(text)
+            build = time.perf_counter() - start
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            start = time.perf_counter()
+            for _ in range(number):
+                if isinstance(app, Markov):
+                    app.walk_graph({}, distance=distance)
+                else:
+                    app.walk_graph(distance=distance)
+            walk = time.perf_counter() - start
+            print(
+                f"{name}: build {build:.2f}s, "
+                f"memory {memory / 1024 / 1024:.1f}MB, "
+                f"{number * distance / walk:.0f} steps/s"
+            )
+
 
 if __name__ == "__main__":
     TestMarkov()
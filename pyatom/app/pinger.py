@@ -3,12 +3,18 @@
     TODO: Add HTTP Post Pinger
 """
 
+import asyncio
+import math
 import random
+import ssl
+import threading
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
 from urllib.parse import urlparse
 from dataclasses import dataclass, asdict
-from typing import Union, Tuple, Dict, Any
+from typing import Union, Any, AsyncIterator, Iterator, Optional, cast
 from http.client import HTTPConnection, HTTPSConnection
 from xmlrpc.client import (
     Transport,
@@ -17,21 +23,27 @@ from xmlrpc.client import (
     ProtocolError,
     ResponseError,
     Fault,
+    dumps,
+    loads,
 )
 from xml.parsers.expat import ExpatError
 
 from tldextract import extract
 
 from pyatom.base.io import IO
-from pyatom.base.log import Logger, init_logger
+from pyatom.client.http import AsyncHttpxTransport
+from pyatom.base.log import Logger
 from pyatom.base.proxy import Proxy
-from pyatom.config import ConfigManager
-from pyatom.config import DIR_DEBUG
 
 
 __all__ = (
     "Service",
+    "Health",
+    "HealthStore",
+    "TunnelPool",
+    "TUNNEL_POOL",
     "XMLPinger",
+    "AsyncXMLPinger",
 )
 
 
@@ -46,11 +58,243 @@ class Service:
     error: str
 
 
-class HTTPProxyTransport(Transport):
+@dataclass
+class Health:
+    """Health history of one ping service.
+
+    Latency in seconds as EWMA of successful pings, `streak` counts
+    consecutive failures, skip service until `cooldown` timestamp.
+    """
+
+    url: str
+    latency: float = 0.0
+    success: int = 0
+    failure: int = 0
+    streak: int = 0
+    checked: float = 0.0
+    cooldown: float = 0.0
+
+    @property
+    def ratio(self) -> float:
+        """Get expected success ratio, Laplace smoothed for new service."""
+        return (self.success + 1) / (self.success + self.failure + 2)
+
+
+class HealthStore:
+    """Persistent service health database for adaptive ping scheduling.
+
+    Failed service cooldown by exponential backoff from `base_delay` up to
+    `max_delay` seconds, re-checked when cooldown expired.
+    """
+
+    def __init__(
+        self,
+        file_health: Optional[Path] = None,
+        alpha: float = 0.3,
+        base_delay: float = 300.0,
+        max_delay: float = 7 * 24 * 3600.0,
+    ) -> None:
+        """Init health store, load from `file_health` if exists.
+
+        Parameters:
+            :alpha:float, weight of newest latency in EWMA
+        """
+        self.file_health = file_health
+        self.alpha = alpha
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.data: dict[str, Health] = {}
+        self.load()
+
+    def load(self) -> int:
+        """Load health records from file, return number loaded."""
+        if not (self.file_health and self.file_health.is_file()):
+            return 0
+        try:
+            items = IO.load_dict(self.file_health)
+        except ValueError:
+            return 0
+        self.data = {url: Health(**item) for url, item in items.items()}
+        return len(self.data)
+
+    def save(self) -> None:
+        """Save health records by replacing, never leave half written file."""
+        if not self.file_health:
+            return
+        with self.lock:
+            data = {url: asdict(health) for url, health in self.data.items()}
+        file_tmp = Path(f"{self.file_health}.tmp")
+        IO.save_dict(file_tmp, data)
+        file_tmp.replace(self.file_health)
+
+    def get(self, url: str) -> Health:
+        """Get health of service url, new record if not seen."""
+        with self.lock:
+            return self.data.setdefault(url, Health(url=url))
+
+    def record(
+        self, url: str, success: bool, latency: float, now: float = 0.0
+    ) -> Health:
+        """Record ping result, update latency EWMA, streak and cooldown."""
+        health = self.get(url)
+        now = now or time.time()
+        with self.lock:
+            health.checked = now
+            if success:
+                health.success += 1
+                health.streak = 0
+                health.cooldown = 0.0
+                health.latency = (
+                    self.alpha * latency + (1 - self.alpha) * health.latency
+                    if health.latency
+                    else latency
+                )
+            else:
+                health.failure += 1
+                health.streak += 1
+                delay = self.base_delay * 2 ** min(health.streak - 1, 32)
+                health.cooldown = now + min(delay, self.max_delay)
+        return health
+
+    def ready(self, url: str, now: float = 0.0) -> bool:
+        """Check if service not in cooldown."""
+        return self.get(url).cooldown <= (now or time.time())
+
+    def order(self, list_service: list[Service]) -> list[Service]:
+        """Sort services by expected success, then lower latency first."""
+        healths = {service.url: self.get(service.url) for service in list_service}
+        return sorted(
+            list_service,
+            key=lambda x: (-healths[x.url].ratio, healths[x.url].latency),
+        )
+
+
+class TunnelPool:
+    """Pool of keep-alive tunnel connections keyed by (proxy, host, scheme).
+
+    Idle connections older than `max_idle` seconds closed instead of reused.
+    """
+
+    def __init__(self, max_size: int = 4, max_idle: float = 30.0) -> None:
+        """Init pool, keep at most `max_size` idle connections per key."""
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.idle: dict[tuple[str, str, str], list[tuple[float, HTTPConnection]]] = {}
+        self.lock = threading.Lock()
+        self.reused = 0
+
+    def get(self, key: tuple[str, str, str]) -> Optional[HTTPConnection]:
+        """Borrow idle connection for key, None if nothing to reuse."""
+        with self.lock:
+            items = self.idle.get(key) or []
+            while items:
+                stamp, connection = items.pop()
+                if time.monotonic() - stamp <= self.max_idle:
+                    self.reused += 1
+                    return connection
+                connection.close()
+        return None
+
+    def put(self, key: tuple[str, str, str], connection: HTTPConnection) -> None:
+        """Return connection for reuse, close if already closed or pool full."""
+        with self.lock:
+            items = self.idle.setdefault(key, [])
+            if connection.sock is not None and len(items) < self.max_size:
+                items.append((time.monotonic(), connection))
+                return
+        connection.close()
+
+    def clear(self) -> None:
+        """Close all idle connections."""
+        with self.lock:
+            for items in self.idle.values():
+                for _, connection in items:
+                    connection.close()
+            self.idle.clear()
+
+
+TUNNEL_POOL = TunnelPool()
+
+
+class TunnelMixin(Transport):
+    """Make tunnel connection through proxy, borrow from pool if provided.
+
+    Call `release` when done to return connection into pool, `close` to
+    discard it, eg: on error.
+    """
+
+    connection_cls: type[HTTPConnection] = HTTPConnection
+
+    proxy: Proxy
+    proxy_headers: dict[str, str]
+    timeout: int
+    pool: Optional[TunnelPool]
+
+    def pool_key(self, host: Any) -> tuple[str, str, str]:
+        """Get pool key for target host."""
+        return self.proxy.url, str(host), self.connection_cls.__name__
+
+    def make_connection(
+        self, host: Union[str, tuple[str, dict[str, str]]]
+    ) -> HTTPConnection:
+        """Make Connection, reuse current or pooled one for same host."""
+        if self._connection[1] is not None and host == self._connection[0]:
+            return self._connection[1]
+        self.release()
+
+        connection = self.pool.get(self.pool_key(host)) if self.pool else None
+        if connection is None:
+            connection = self.connection_cls(self.proxy.addr, self.proxy.port)
+            connection.set_tunnel(str(host), headers=self.proxy_headers)
+        elif connection.sock is not None:
+            connection.sock.settimeout(self.timeout)
+        connection.timeout = self.timeout
+        self._connection = host, connection
+        return connection
+
+    def single_request(
+        self,
+        host: Union[str, tuple[str, dict[str, str]]],
+        handler: str,
+        request_body: Any,
+        verbose: bool = False,
+    ) -> Any:
+        """Send request, discard connection after error response.
+
+        Error response body may be left unread, connection never reused.
+        """
+        try:
+            return super().single_request(host, handler, request_body, verbose)
+        except ProtocolError:
+            self.close()
+            raise
+
+    def release(self) -> None:
+        """Return current connection into pool, close if no pool."""
+        host, connection = self._connection
+        if connection is None:
+            return
+        self._connection = (None, None)
+        if self.pool:
+            self.pool.put(self.pool_key(host), connection)
+        else:
+            connection.close()
+
+
+class HTTPProxyTransport(TunnelMixin):
     """HTTP Proxy Transport."""
 
-    def __init__(self, user_agent: str, proxy_url: str, time_out: int):
-        """Init."""
+    connection_cls = HTTPConnection
+
+    def __init__(
+        self,
+        user_agent: str,
+        proxy_url: str,
+        time_out: int,
+        pool: Optional[TunnelPool] = None,
+    ):
+        """Init, reuse tunnel connections if `pool` provided."""
         Transport.__init__(self)
 
         self.user_agent = user_agent
@@ -58,23 +302,22 @@ class HTTPProxyTransport(Transport):
         key, value = self.proxy.auth
         self.proxy_headers = {key: value}
         self.timeout = time_out
+        self.pool = pool
 
-    def make_connection(
-        self, host: Union[Tuple[str, Dict[str, str]], str]
-    ) -> HTTPConnection:
-        """Make Connection."""
-        connection = HTTPConnection(self.proxy.addr, self.proxy.port)
-        connection.timeout = self.timeout
-        connection.set_tunnel(str(host), headers=self.proxy_headers)
-        self._connection = host, connection
-        return connection
 
-
-class HTTPSProxyTransport(SafeTransport):
+class HTTPSProxyTransport(TunnelMixin, SafeTransport):
     """HTTPS Proxy Transport."""
 
-    def __init__(self, user_agent: str, proxy_url: str, time_out: int):
-        """Init."""
+    connection_cls = HTTPSConnection
+
+    def __init__(
+        self,
+        user_agent: str,
+        proxy_url: str,
+        time_out: int,
+        pool: Optional[TunnelPool] = None,
+    ):
+        """Init, reuse tunnel connections if `pool` provided."""
         SafeTransport.__init__(self)
 
         self.user_agent = user_agent
@@ -82,16 +325,13 @@ class HTTPSProxyTransport(SafeTransport):
         key, value = self.proxy.auth
         self.proxy_headers = {key: value}
         self.timeout = time_out
+        self.pool = pool
 
     def make_connection(
-        self, host: Union[Tuple[str, Dict[str, str]], str]
+        self, host: Union[str, tuple[str, dict[str, str]]]
     ) -> HTTPSConnection:
-        """Make Connection."""
-        connection = HTTPSConnection(self.proxy.addr, self.proxy.port)
-        connection.timeout = self.timeout
-        connection.set_tunnel(str(host), headers=self.proxy_headers)
-        self._connection = host, connection
-        return connection
+        """Make tunnel connection of `HTTPSConnection`."""
+        return cast(HTTPSConnection, super().make_connection(host))
 
 
 class BasePinger:
@@ -167,37 +407,69 @@ class XMLPinger(BasePinger):
         "list_px",
         "logger",
         "time_out",
+        "workers",
+        "deadline",
+        "pool",
+        "health",
     )
 
+    check_ping = {
+        "site_name": "Github",
+        "home_url": "https://github.com/",
+        "post_url": "https://github.com/about",
+    }
+
     def __init__(
-        self, list_ua: list[str], list_px: list[str], logger: Logger, time_out: int = 30
+        self,
+        list_ua: list[str],
+        list_px: list[str],
+        logger: Logger,
+        time_out: int = 30,
+        workers: int = 16,
+        deadline: float = 0.0,
+        pool: Optional[TunnelPool] = TUNNEL_POOL,
+        health: Optional[HealthStore] = None,
     ) -> None:
-        """Init XML RPC Pinger."""
+        """Init XML RPC Pinger.
+
+        Parameters:
+            :workers:int, max number of services pinged concurrently
+            :deadline:float, max seconds for one service ping, no limit if zero
+            :pool:TunnelPool, reuse proxy tunnels across pings, never if None
+            :health:HealthStore, order services and skip those in cooldown
+        """
         super().__init__(list_ua=list_ua, list_px=list_px)
 
         self.logger = logger
         self.time_out = time_out
-
-    def to_client(self, service_url: str) -> ServerProxy:
-        """Generate ServerProxy client."""
+        self.workers = workers
+        self.deadline = deadline
+        self.pool = pool
+        self.health = health
+
+    def to_tunnel(
+        self, service_url: str, time_out: int = 0
+    ) -> Union[HTTPProxyTransport, HTTPSProxyTransport]:
+        """Generate tunnel transport for service url."""
         if service_url.startswith("https"):
-            return ServerProxy(
-                service_url,
-                transport=HTTPSProxyTransport(
-                    user_agent=self.rnd_ua,
-                    proxy_url=self.rnd_px,
-                    time_out=self.time_out,
-                ),
-            )
-        return ServerProxy(
-            service_url,
-            transport=HTTPProxyTransport(
+            return HTTPSProxyTransport(
                 user_agent=self.rnd_ua,
                 proxy_url=self.rnd_px,
-                time_out=self.time_out,
-            ),
+                time_out=time_out or self.time_out,
+                pool=self.pool,
+            )
+        return HTTPProxyTransport(
+            user_agent=self.rnd_ua,
+            proxy_url=self.rnd_px,
+            time_out=time_out or self.time_out,
+            pool=self.pool,
         )
 
+    def to_client(self, service_url: str, time_out: int = 0) -> ServerProxy:
+        """Generate ServerProxy client."""
+        transport = self.to_tunnel(service_url, time_out=time_out)
+        return ServerProxy(service_url, transport=transport)
+
     def basic_ping(self, client: ServerProxy, site_name: str, home_url: str) -> Any:
         """weblogUpdates.ping method."""
         try:
@@ -238,22 +510,139 @@ class XMLPinger(BasePinger):
         return True, response_str
 
     def ping(
-        self, service: Service, site_name: str, home_url: str, post_url: str
+        self,
+        service: Service,
+        site_name: str,
+        home_url: str,
+        post_url: str,
+        time_out: int = 0,
     ) -> tuple[bool, str]:
-        """weblogUpdates.extendedPing and weblogUpdates.ping method."""
-        client = self.to_client(service.url)
+        """weblogUpdates.extendedPing and weblogUpdates.ping method.
 
-        response = self.extended_ping(
-            client=client, site_name=site_name, home_url=home_url, post_url=post_url
-        )
-        success, result = self.parse_respnose(response)
-        if success:
-            return success, result
+        Tunnel connection released into pool for next ping when done.
+        """
+        transport = self.to_tunnel(service.url, time_out=time_out)
+        client = ServerProxy(service.url, transport=transport)
+        try:
+            response = self.extended_ping(
+                client=client, site_name=site_name, home_url=home_url, post_url=post_url
+            )
+            success, result = self.parse_respnose(response)
+            if success:
+                return success, result
 
-        response = self.basic_ping(
-            client=client, site_name=site_name, home_url=home_url
-        )
-        return self.parse_respnose(response)
+            response = self.basic_ping(
+                client=client, site_name=site_name, home_url=home_url
+            )
+            return self.parse_respnose(response)
+        finally:
+            transport.release()
+
+    def schedule(
+        self, list_service: list[Service]
+    ) -> tuple[list[Service], list[Service]]:
+        """Split services into ordered ready ones and those in cooldown."""
+        if not self.health:
+            return list_service, []
+        ready, cooling = [], []
+        for service in list_service:
+            if self.health.ready(service.url):
+                ready.append(service)
+            else:
+                cooling.append(service)
+        return self.health.order(ready), cooling
+
+    def record(self, service: Service, success: bool, latency: float) -> None:
+        """Record ping result into health store if provided."""
+        if self.health:
+            self.health.record(service.url, success, latency)
+
+    @staticmethod
+    def to_wait(
+        running: dict[Future, tuple[Service, float]], deadline: float
+    ) -> Optional[float]:
+        """Get seconds until first running ping over deadline, None if no limit."""
+        if not (deadline and running):
+            return None
+        due = min(start for _, start in running.values()) + deadline
+        return max(due - time.monotonic(), 0.0)
+
+    def iter_finished(
+        self, finished: set[Future], running: dict[Future, tuple[Service, float]]
+    ) -> Iterator[tuple[Service, bool, str]]:
+        """Pop finished pings from running, record and yield results."""
+        for future in finished:
+            if future in running:
+                service, start = running.pop(future)
+                success, response_str = future.result()
+                self.record(service, success, time.monotonic() - start)
+                yield service, success, response_str
+
+    def iter_expired(
+        self,
+        running: dict[Future, tuple[Service, float]],
+        abandoned: set[Future],
+        deadline: float,
+    ) -> Iterator[tuple[Service, bool, str]]:
+        """Move pings over deadline from running into abandoned, yield failed."""
+        now = time.monotonic()
+        for future, (service, start) in list(running.items()):
+            if start + deadline <= now:
+                del running[future]
+                abandoned.add(future)
+                self.record(service, False, deadline)
+                yield service, False, f"deadline exceeded: {deadline}s"
+
+    def iter_pinging(
+        self,
+        list_service: list[Service],
+        site_name: str,
+        home_url: str,
+        post_url: str,
+        workers: int = 0,
+        deadline: float = 0.0,
+    ) -> Iterator[tuple[Service, bool, str]]:
+        """
+        Ping services concurrently, yield (service, success, response_str)
+        as each finished. Ping running over `deadline` seconds yielded as
+        failed without waiting, its thread still counted until socket timeout.
+        With health store, services in cooldown yielded as failed without
+        ping, others pinged by expected success, results recorded and saved.
+        """
+        workers = workers or self.workers
+        deadline = deadline or self.deadline
+        time_out = min(self.time_out, math.ceil(deadline)) if deadline else 0
+
+        list_service, cooling = self.schedule(list_service)
+        for service in cooling:
+            yield service, False, "cooldown after failures"
+
+        pending = deque(list_service)
+        running: dict[Future, tuple[Service, float]] = {}
+        abandoned: set[Future] = set()
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            while pending or running:
+                abandoned = {future for future in abandoned if not future.done()}
+                while pending and len(running) + len(abandoned) < workers:
+                    service = pending.popleft()
+                    future = executor.submit(
+                        self.ping, service, site_name, home_url, post_url, time_out
+                    )
+                    running[future] = service, time.monotonic()
+
+                finished, _ = wait(
+                    set(running) | abandoned,
+                    timeout=self.to_wait(running, deadline),
+                    return_when=FIRST_COMPLETED,
+                )
+                yield from self.iter_finished(finished, running)
+                if deadline:
+                    yield from self.iter_expired(running, abandoned, deadline)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self.health:
+                self.health.save()
 
     def pinging(
         self,
@@ -262,16 +651,19 @@ class XMLPinger(BasePinger):
         home_url: str,
         post_url: str,
         strict: bool = False,
+        workers: int = 0,
+        deadline: float = 0.0,
     ) -> tuple[bool, float]:
         """Send ping request to alive services, Return tuple of success and success ratio."""
         total, good = len(list_service), 0
-        for service in list_service:
-            okay, _ = self.ping(
-                service=service,
-                site_name=site_name,
-                home_url=home_url,
-                post_url=post_url,
-            )
+        for _, okay, _ in self.iter_pinging(
+            list_service=list_service,
+            site_name=site_name,
+            home_url=home_url,
+            post_url=post_url,
+            workers=workers,
+            deadline=deadline,
+        ):
             if okay:
                 good += 1
 
@@ -279,20 +671,20 @@ class XMLPinger(BasePinger):
         ratio = float(good / total)
         return success, ratio
 
-    def check_service(self, service: Service) -> tuple[bool, str]:
+    def check_service(self, service: Service, time_out: int = 0) -> tuple[bool, str]:
         """Check service alive."""
-        site_name = "Github"
-        home_url = "https://github.com/"
-        post_url = "https://github.com/about"
         return self.ping(
             service=service,
-            site_name=site_name,
-            home_url=home_url,
-            post_url=post_url,
+            site_name=self.check_ping["site_name"],
+            home_url=self.check_ping["home_url"],
+            post_url=self.check_ping["post_url"],
+            time_out=time_out,
         )
 
-    def checking_service(self, list_service_url: list[str]) -> list[Service]:
-        """Checking list of new service url, Return list of Service."""
+    def checking_service(
+        self, list_service_url: list[str], workers: int = 0, deadline: float = 0.0
+    ) -> list[Service]:
+        """Checking list of new service url concurrently, Return list of Service."""
         list_service_url = [self.normalize(url) for url in list_service_url]
         list_service_url = [url for url in list_service_url if url]
         list_service_url = list(set(list_service_url))
@@ -301,18 +693,24 @@ class XMLPinger(BasePinger):
             return []
 
         checked, good = 0, 0
-        list_service: list[Service] = []
         list_service_url = sorted(list_service_url)
         checked = len(list_service_url)
         self.logger.info(f"<{checked}>list_service_url to check...")
 
-        for index, service_url in enumerate(list_service_url):
-            service = self.to_service(service_url)
-            success, response_str = self.check_service(service)
+        list_service = [self.to_service(url) for url in list_service_url]
+        for index, (service, success, response_str) in enumerate(
+            self.iter_pinging(
+                list_service=list_service,
+                site_name=self.check_ping["site_name"],
+                home_url=self.check_ping["home_url"],
+                post_url=self.check_ping["post_url"],
+                workers=workers,
+                deadline=deadline,
+            )
+        ):
             self.logger.info(f"<{index}>[{success}] `{service.url}` -- {response_str}")
             service.alive = success
             service.error = response_str
-            list_service.append(service)
 
             if success:
                 good += 1
@@ -321,69 +719,214 @@ class XMLPinger(BasePinger):
         return list_service
 
 
-class TestPinger:
-    """TestCase for Pinger."""
+class AsyncXMLPinger(XMLPinger):
+    """Asyncio XML-RPC Pinger.
 
-    file_config = DIR_DEBUG.parent / "protect" / "config.json"
-    config = ConfigManager().load(file_config)
+    Build `weblogUpdates` payloads and post them over `httpx.AsyncClient`
+    by `AsyncHttpxTransport`. Thousands of services pinged by one event loop
+    under overall time budget, stragglers cancelled. Response parsed same as
+    `XMLPinger.parse_respnose`.
 
-    logger = init_logger(name="test")
+    Clients sharded per proxy with at most `shard_size` connections each,
+    httpcore pool scheduling cost grows fast with large pool size. No
+    `TunnelPool`, httpx keeps proxy connections alive by itself.
+    """
 
-    list_service_url = [
-        "http://rpc.pingomatic.com",
-        "https://rpc.twingly.com/",
-        #  "http://ping.blo.gs/",  # Failed at 2022-02-14
-        "http://www.blogdigger.com/RPC2",
-    ]
+    __slots__ = ("budget",)
 
-    def test_base_pinger(self) -> None:
-        """Test BasePinger."""
-        pinger = BasePinger(
-            list_ua=[self.config.user_agent], list_px=[self.config.proxy_url]
-        )
-        assert self.config.user_agent == pinger.rnd_ua
-        assert self.config.proxy_url == pinger.rnd_px
-
-        assert pinger.normalize("ftp://hello.com") == ""
-        assert pinger.normalize("http://bing.com/") == "http://bing.com"
-
-        list_service = [pinger.to_service(url) for url in self.list_service_url]
-        file_service = DIR_DEBUG / "pinger.service.json"
-        pinger.save_services(file_service, list_service)
-        assert file_service.is_file()
-        assert list_service == pinger.load_services(file_service)
-        file_service.unlink(missing_ok=True)
-        assert file_service.is_file() is False
-
-    def test_xml_pinger(self) -> None:
-        """Test XMLPinger."""
-        pinger = XMLPinger(
-            list_ua=[self.config.user_agent],
-            list_px=[self.config.proxy_url],
-            logger=self.logger,
+    shard_size = 8
+
+    def __init__(
+        self,
+        list_ua: list[str],
+        list_px: list[str],
+        logger: Logger,
+        time_out: int = 30,
+        workers: int = 16,
+        budget: float = 0.0,
+        health: Optional[HealthStore] = None,
+    ) -> None:
+        """Init Async XML RPC Pinger.
+
+        Parameters:
+            :workers:int, max number of pings in flight
+            :budget:float, max seconds for whole run of pings, no limit if zero
+            :health:HealthStore, order services and skip those in cooldown
+        """
+        super().__init__(
+            list_ua=list_ua,
+            list_px=list_px,
+            logger=logger,
+            time_out=time_out,
+            workers=workers,
+            pool=None,
+            health=health,
         )
-        list_service = [pinger.to_service(url) for url in self.list_service_url]
-        assert len(list_service) == len(self.list_service_url)
-        list_client = [pinger.to_client(url) for url in self.list_service_url]
-        assert len(list_client) == len(self.list_service_url)
+        self.budget = budget
 
-        # Check service alive.
-        for service in list_service:
-            success, _ = pinger.check_service(service)
-            assert success is True
+    def to_transport(
+        self,
+        transports: dict[tuple[str, int], AsyncHttpxTransport],
+        shard: int,
+        context: ssl.SSLContext,
+    ) -> AsyncHttpxTransport:
+        """Get transport of random proxy for shard, create if not exists."""
+        key = (self.rnd_px if self.list_px else "", shard)
+        if key not in transports:
+            transports[key] = AsyncHttpxTransport(
+                proxy_url=key[0],
+                pool_size=self.shard_size,
+                http2=False,
+                verify=context,
+            )
+        return transports[key]
+
+    async def acall(
+        self, transport: AsyncHttpxTransport, url: str, method: str, params: tuple
+    ) -> Any:
+        """Call XML-RPC method, return result or error like `ServerProxy`."""
+        headers = {"Content-Type": "text/xml", "User-Agent": self.rnd_ua}
+        errors = (ProtocolError, ResponseError, Fault, OSError, ExpatError)
+        try:
+            response = await transport.request(
+                "POST",
+                url,
+                data=dumps(params, method).encode(),
+                headers=headers,
+                timeout=self.time_out,
+            )
+            if response.status_code != 200:
+                raise ProtocolError(
+                    url,
+                    response.status_code,
+                    response.reason_phrase,
+                    dict(response.headers),
+                )
+            params, _ = loads(response.content)
+            if not params:
+                raise ResponseError(f"empty response: {url}")
+            return params[0]
+        except errors + transport.errors as err:
+            self.logger.error(err)
+            return err
 
-        # Checking list service.
-        list_service = pinger.checking_service(self.list_service_url)
-        assert len(list_service) == len(self.list_service_url)
-        assert any(service.alive is True for service in list_service)
+    async def aping(
+        self,
+        transport: AsyncHttpxTransport,
+        service: Service,
+        site_name: str,
+        home_url: str,
+        post_url: str,
+    ) -> tuple[bool, str]:
+        """weblogUpdates.extendedPing and weblogUpdates.ping method."""
+        response = await self.acall(
+            transport,
+            service.url,
+            "weblogUpdates.extendedPing",
+            (site_name, home_url, post_url),
+        )
+        success, result = self.parse_respnose(response)
+        if success:
+            return success, result
 
-        site_name = "Github"
-        home_url = "https://github.com/"
-        post_url = "https://github.com/about"
-        success, ratio = pinger.pinging(list_service, site_name, home_url, post_url)
-        assert success is True
-        assert ratio > 0
+        response = await self.acall(
+            transport, service.url, "weblogUpdates.ping", (site_name, home_url)
+        )
+        return self.parse_respnose(response)
 
+    async def aiter_pinging(
+        self,
+        list_service: list[Service],
+        site_name: str,
+        home_url: str,
+        post_url: str,
+        workers: int = 0,
+        budget: float = 0.0,
+    ) -> AsyncIterator[tuple[Service, bool, str]]:
+        """
+        Ping services concurrently, yield (service, success, response_str)
+        as each finished. At most `workers` pings in flight, pings unfinished
+        when overall `budget` seconds passed are cancelled, recorded and
+        yielded as failed.
+        """
+        workers = workers or self.workers
+        budget = budget or self.budget
+        list_service, cooling = self.schedule(list_service)
+        for service in cooling:
+            yield service, False, "cooldown after failures"
+
+        loop = asyncio.get_running_loop()
+        end = loop.time() + budget if budget else 0.0
+        semaphore = asyncio.Semaphore(workers)
+        shards = math.ceil(workers / self.shard_size)
+        context = ssl.create_default_context()
+        transports: dict[tuple[str, int], AsyncHttpxTransport] = {}
+
+        async def run(index: int, service: Service) -> tuple[bool, str, float]:
+            """Ping one service when slot available, return with latency."""
+            async with semaphore:
+                transport = self.to_transport(transports, index % shards, context)
+                start = loop.time()
+                success, response_str = await self.aping(
+                    transport, service, site_name, home_url, post_url
+                )
+                return success, response_str, loop.time() - start
+
+        tasks = {
+            asyncio.ensure_future(run(index, service)): service
+            for index, service in enumerate(list_service)
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                timeout = max(end - loop.time(), 0.0) if end else None
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    success, response_str, latency = task.result()
+                    self.record(tasks[task], success, latency)
+                    yield tasks[task], success, response_str
+
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in pending:
+                self.record(tasks[task], False, budget)
+                yield tasks[task], False, f"budget exceeded: {budget}s"
+        finally:
+            for task in pending:
+                task.cancel()
+            for transport in transports.values():
+                await transport.aclose()
+            if self.health:
+                self.health.save()
+
+    async def apinging(
+        self,
+        list_service: list[Service],
+        site_name: str,
+        home_url: str,
+        post_url: str,
+        strict: bool = False,
+        workers: int = 0,
+        budget: float = 0.0,
+    ) -> tuple[bool, float]:
+        """Send ping request to services, Return tuple of success and ratio."""
+        total, good = len(list_service), 0
+        async for _, okay, _ in self.aiter_pinging(
+            list_service=list_service,
+            site_name=site_name,
+            home_url=home_url,
+            post_url=post_url,
+            workers=workers,
+            budget=budget,
+        ):
+            if okay:
+                good += 1
 
-if __name__ == "__main__":
-    TestPinger()
+        success = bool(good == total if strict else good > 0)
+        ratio = float(good / total)
+        return success, ratio
@@ -4,49 +4,163 @@
 """
 
 import hashlib
+import os
 import random
 import string
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, Callable, Iterable, Union
 
 import regex as re
 
+from pyatom.config import DIR_DEBUG
+
 
 __all__ = (
     "str_rnd",
+    "str_rnd_many",
+    "to_alphabet",
+    "to_hasher",
     "hash2s",
     "hash2b",
+    "hash2s_many",
+    "hash2b_many",
+    "file_hash",
+    "file_hash_many",
 )
 
 
+SEED_LOWER = string.ascii_lowercase + string.digits
+SEED_UPPER = string.ascii_letters + string.digits
+SEED_STRONG = string.ascii_letters + string.digits + "@#$%"
+SEED_ULTRA = string.ascii_letters + string.digits + string.punctuation
+
+HASH_ALGORITHMS = ("md5", "sha1", "sha256", "blake2b", "xxhash")
+
+
+def to_alphabet(upper: bool = False, strong: bool = False, ultra: bool = False) -> str:
+    """Get alphabet of random string by options, later option wins."""
+    if ultra is True:
+        return SEED_ULTRA
+    if strong is True:
+        return SEED_STRONG
+    if upper is True:
+        return SEED_UPPER
+    return SEED_LOWER
+
+
 def str_rnd(
     number: int = 12, upper: bool = False, strong: bool = False, ultra: bool = False
 ) -> str:
     """generate random string"""
-    seed = string.ascii_lowercase + string.digits
-    if upper is True:
-        seed = string.ascii_letters + string.digits
-    if strong is True:
-        seed = string.ascii_letters + string.digits + "@#$%"
-    if ultra is True:
-        seed = string.ascii_letters + string.digits + string.punctuation
-    rnd = [random.choice(seed) for _ in range(number)]
-    return "".join(rnd)
+    return "".join(random.choices(to_alphabet(upper, strong, ultra), k=number))
 
 
-def hash2s(text: str) -> str:
+def str_rnd_many(
+    number: int, length: int = 12, alphabet: str = SEED_LOWER
+) -> list[str]:
+    """Generate `number` random strings from `os.urandom` in one batch.
+
+    Random bytes mapped into ascii `alphabet` by one `bytes.translate`, bytes
+    over the largest multiple of alphabet size dropped to avoid modulo bias.
+    """
+    if length <= 0:
+        raise ValueError(f"length must be positive: {length}")
+    size = len(alphabet)
+    if not 0 < size <= 256 or not alphabet.isascii():
+        raise ValueError(f"alphabet must be 1-256 ascii chars: {alphabet}")
+    limit = 256 - 256 % size
+    table = bytes(ord(alphabet[index % size]) for index in range(256))
+    dropped = bytes(range(limit, 256))
+
+    total = number * length
+    chars = b""
+    while len(chars) < total:
+        need = total - len(chars)
+        chars += os.urandom(need * 256 // limit + 64).translate(table, dropped)
+    text = chars[:total].decode("ascii")
+    return [text[index : index + length] for index in range(0, total, length)]
+
+
+def to_hasher(algorithm: str = "md5") -> Callable[..., Any]:
+    """Get hash object constructor of algorithm.
+
+    Crypto `md5`, `sha1`, `sha256`, or fast `blake2b` with 16 bytes digest,
+    or non-crypto `xxhash` (xxh3_128) for cache keys if installed.
+    """
+    if algorithm not in HASH_ALGORITHMS:
+        raise ValueError(f"unsupported hash algorithm: {algorithm}")
+    if algorithm == "blake2b":
+        return partial(hashlib.blake2b, digest_size=16)
+    if algorithm == "xxhash":
+        import xxhash  # pylint: disable=import-outside-toplevel
+
+        return xxhash.xxh3_128
+    new: Callable[..., Any] = getattr(hashlib, algorithm)
+    return new
+
+
+def hash2s(text: str, algorithm: str = "md5") -> str:
     """generate hash string for text string"""
-    middle = hashlib.md5(text.encode())
-    return middle.hexdigest()
+    middle = to_hasher(algorithm)(text.encode())
+    return str(middle.hexdigest())
 
 
-def hash2b(text: str) -> bytes:
+def hash2b(text: str, algorithm: str = "md5") -> bytes:
     """generate hash bytes for text string"""
-    middle = hashlib.md5(text.encode())
-    return middle.digest()
+    middle = to_hasher(algorithm)(text.encode())
+    return bytes(middle.digest())
+
+
+def hash2s_many(texts: Iterable[str], algorithm: str = "md5") -> list[str]:
+    """generate hash string for each text string"""
+    new = to_hasher(algorithm)
+    return [new(text.encode()).hexdigest() for text in texts]
+
+
+def hash2b_many(texts: Iterable[str], algorithm: str = "md5") -> list[bytes]:
+    """generate hash bytes for each text string"""
+    new = to_hasher(algorithm)
+    return [new(text.encode()).digest() for text in texts]
+
+
+def file_hash(
+    file_name: Union[Path, str], algorithm: str = "md5", chunk_size: int = 1024 * 1024
+) -> str:
+    """Get hash string of file, streamed by blocks into one reused buffer."""
+    hasher = to_hasher(algorithm)()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(file_name, "rb") as file:
+        while size := file.readinto(buffer):
+            hasher.update(view[:size])
+    return str(hasher.hexdigest())
+
+
+def file_hash_many(
+    file_names: Iterable[Union[Path, str]],
+    algorithm: str = "md5",
+    workers: int = 4,
+    chunk_size: int = 1024 * 1024,
+) -> list[str]:
+    """Get hash string of each file by thread pool, hashlib releases the GIL."""
+    func = partial(file_hash, algorithm=algorithm, chunk_size=chunk_size)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, file_names))
 
 
 class TestChars:
     """TestCase for chars operation."""
 
+    @staticmethod
+    def to_algorithms(*names: str) -> list[str]:
+        """Get hash algorithms to test, `xxhash` skipped if not installed."""
+        return [x for x in names if x != "xxhash" or find_spec("xxhash")]
+
     @staticmethod
     def test_str_rnd() -> None:
         """Test string random generation."""
@@ -93,6 +207,129 @@ class TestChars:
             assert hash_bytes and hash_bytes not in hash_set
             hash_set.add(hash_bytes)
 
+    @staticmethod
+    def test_str_rnd_many() -> None:
+        """Test batch random strings length, alphabet and uniform chars."""
+        assert str_rnd_many(0) == []
+        for alphabet in (SEED_LOWER, SEED_ULTRA, "ab", "0123456789abcdef"):
+            chars = str_rnd_many(5000, length=32, alphabet=alphabet)
+            assert len(chars) == len(set(chars)) == 5000
+            assert all(len(x) == 32 and set(x) <= set(alphabet) for x in chars)
+            text, expected = "".join(chars), 160000 / len(alphabet)
+            assert all(abs(text.count(x) - expected) < expected * 0.2 for x in alphabet)
+        for alphabet in ("", "中文", "a" * 257):
+            try:
+                str_rnd_many(1, alphabet=alphabet)
+                raise AssertionError(f"invalid alphabet accepted: {alphabet}")
+            except ValueError:
+                pass
+        for length in (0, -1):
+            try:
+                str_rnd_many(1, length=length)
+                raise AssertionError(f"invalid length accepted: {length}")
+            except ValueError:
+                pass
+
+    @staticmethod
+    def test_hash_many() -> None:
+        """Test hash for many texts same as one by one."""
+        texts = str_rnd_many(100)
+        for algorithm in TestChars.to_algorithms(*HASH_ALGORITHMS):
+            hashes = hash2s_many(texts, algorithm)
+            assert hashes == [hash2s(x, algorithm) for x in texts]
+            assert len(set(hashes)) == 100
+            assert hash2b_many(texts, algorithm)[0] == hash2b(texts[0], algorithm)
+        assert hash2s("text") == hashlib.md5(b"text").hexdigest()
+        for algorithm in TestChars.to_algorithms("blake2b", "xxhash"):
+            assert len(hash2s("text", algorithm)) == 32
+        for algorithm in ("sha512", "new", "__class__"):
+            try:
+                hash2s("text", algorithm)
+                raise AssertionError(f"invalid algorithm accepted: {algorithm}")
+            except ValueError:
+                pass
+
+    @staticmethod
+    def test_bench_chars(number: int = 200000) -> None:
+        """Benchmark random strings and hashes per second."""
+        seed = SEED_LOWER
+        start = time.perf_counter()
+        for _ in range(number // 10):
+            "".join([random.choice(seed) for _ in range(12)])
+        legacy = number // 10 / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(number // 10):
+            str_rnd()
+        single = number // 10 / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        texts = str_rnd_many(number)
+        batch = number / (time.perf_counter() - start)
+        print(f"str_rnd: legacy {legacy:.0f}/s, {single:.0f}/s, batch {batch:.0f}/s")
+
+        texts = [f"https://example.com/api?q={x}" for x in texts]
+        start = time.perf_counter()
+        for text in texts:
+            hashlib.md5(text.encode()).hexdigest()
+        result = {"legacy md5": number / (time.perf_counter() - start)}
+        for algorithm in TestChars.to_algorithms("md5", "sha256", "blake2b", "xxhash"):
+            start = time.perf_counter()
+            hash2s_many(texts, algorithm)
+            result[algorithm] = number / (time.perf_counter() - start)
+        for name, speed in result.items():
+            print(f"hash2s {name}: {speed:.0f}/s")
+
+    @staticmethod
+    def test_file_hash() -> None:
+        """Test file hash same as hash of whole bytes, for each algorithm."""
+        files = [DIR_DEBUG / f"chars-{index}.bin" for index in range(4)]
+        for index, file in enumerate(files):
+            file.write_bytes(os.urandom(index * 700000))
+        for algorithm in TestChars.to_algorithms("md5", "sha256", "blake2b", "xxhash"):
+            new = to_hasher(algorithm)
+            expected = [new(x.read_bytes()).hexdigest() for x in files]
+            assert [file_hash(x, algorithm, 65536) for x in files] == expected
+            assert file_hash_many(files, algorithm, workers=2) == expected
+        for file in files:
+            file.unlink()
+
+    @staticmethod
+    def test_bench_file_hash(number: int = 4, size: int = 4 * 1024 * 1024) -> None:
+        """Benchmark MB/s and peak memory of whole bytes vs streaming hash."""
+        files = [DIR_DEBUG / f"chars-{index}.bin" for index in range(number)]
+        for file in files:
+            file.write_bytes(os.urandom(size))
+        total = number * size / 1024 / 1024
+
+        def measure(name: str, func: Callable[[], Any]) -> float:
+            tracemalloc.start()
+            start = time.perf_counter()
+            func()
+            speed = total / (time.perf_counter() - start)
+            peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            tracemalloc.stop()
+            print(f"{name}: {speed:.0f}MB/s, peak {peak:.1f}MB")
+            return peak
+
+        def hash_files(algorithm: str) -> list[str]:
+            return [file_hash(x, algorithm) for x in files]
+
+        legacy = measure(
+            "legacy md5",
+            lambda: [hashlib.md5(x.read_bytes()).hexdigest() for x in files],
+        )
+        for algorithm in TestChars.to_algorithms("md5", "sha256", "blake2b", "xxhash"):
+            peak = measure(algorithm, partial(hash_files, algorithm))
+            assert peak < legacy
+        for workers in (2, 4):
+            measure(
+                f"md5 <{workers}>workers",
+                partial(file_hash_many, files, "md5", workers=workers),
+            )
+        for file in files:
+            file.unlink()
+
 
 if __name__ == "__main__":
     TestChars()
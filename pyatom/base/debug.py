@@ -2,18 +2,25 @@
     Debugger
 """
 
+import gzip
 import json
+import queue
 import random
 import string
+import threading
 from pathlib import Path
 from typing import Any, Union
 
 import arrow
+import orjson
 
 from pyatom.config import DIR_DEBUG
 
 
-__all__ = ("Debugger",)
+__all__ = (
+    "Debugger",
+    "DebugRecorder",
+)
 
 
 class Debugger:
@@ -85,6 +92,162 @@ class Debugger:
         return result
 
 
+class DebugRecorder:
+    """Background Debug Recorder for long running session.
+
+    Records are put into bounded queue without blocking the caller, and
+    appended into rotating JSONL file, optional gzip compressed, by one
+    writer thread in batches. Records dropped when queue is full.
+    """
+
+    __slots__ = (
+        "path",
+        "name",
+        "sample_rate",
+        "max_bytes",
+        "backup_count",
+        "batch_size",
+        "compress",
+        "dropped",
+        "written",
+        "closed",
+        "queue",
+        "thread",
+    )
+
+    def __init__(
+        self,
+        path: Path,
+        name: str = "debug",
+        sample_rate: float = 1.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        backup_count: int = 3,
+        queue_size: int = 1024,
+        batch_size: int = 64,
+        compress: bool = False,
+    ) -> None:
+        """Init DebugRecorder and start writer thread.
+
+        Parameters:
+            :sample_rate: float, ratio of requests to record, eg: 0.01 for 1%
+            :max_bytes: int, rotate file when size exceed this limit
+            :backup_count: int, number of rotated files to keep
+            :queue_size: int, max records pending in queue
+            :batch_size: int, max records for one file write
+            :compress: bool, write gzip compressed `.jsonl.gz` file
+        """
+        self.path = path
+        self.name = name
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.compress = compress
+
+        self.dropped = 0
+        self.written = 0
+        self.closed = False
+
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.thread = threading.Thread(
+            target=self._run, name=f"recorder-{name}", daemon=True
+        )
+        self.thread.start()
+
+    def to_file(self, index: int = 0) -> Path:
+        """Generate file path for current or rotated index."""
+        suffix = ".jsonl.gz" if self.compress else ".jsonl"
+        name = f"{self.name}.{index}" if index else self.name
+        return Path(self.path, name + suffix)
+
+    def sample(self) -> bool:
+        """Decide if current request should be recorded."""
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def record(self, data: dict) -> bool:
+        """Put record into queue, return False if dropped."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(data)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _rotate(self) -> None:
+        """Rotate files like: name.jsonl -> name.1.jsonl -> name.2.jsonl"""
+        for index in range(self.backup_count - 1, 0, -1):
+            file = self.to_file(index)
+            if file.is_file():
+                file.replace(self.to_file(index + 1))
+        if self.backup_count:
+            self.to_file().replace(self.to_file(1))
+        else:
+            self.to_file().unlink(missing_ok=True)
+
+    def _write(self, batch: list) -> None:
+        """Write batch of records into file."""
+        opt = orjson.OPT_APPEND_NEWLINE
+        lines = b"".join(orjson.dumps(item, default=str, option=opt) for item in batch)
+        if self.compress:
+            lines = gzip.compress(lines)
+
+        file = self.to_file()
+        if file.is_file() and file.stat().st_size + len(lines) > self.max_bytes:
+            self._rotate()
+
+        with open(file, "ab") as handle:
+            handle.write(lines)
+        self.written += len(batch)
+
+    def _run(self) -> None:
+        """Writer thread loop, stop at `None` sentinel."""
+        running = True
+        while running:
+            batch = []
+            item = self.queue.get()
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            running = item is not None
+
+            if batch:
+                try:
+                    self._write(batch)
+                except (OSError, TypeError) as err:
+                    self.dropped += len(batch)
+                    Debugger.log(f"recorder write error: {err}")
+
+            for _ in range(len(batch) + int(not running)):
+                self.queue.task_done()
+
+    def flush(self) -> None:
+        """Block until all queued records written."""
+        self.queue.join()
+
+    def close(self) -> None:
+        """Flush records and stop writer thread."""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+
+    def del_files(self) -> bool:
+        """Delete all recorded files."""
+        for index in range(self.backup_count + 1):
+            self.to_file(index).unlink(missing_ok=True)
+        return True
+
+
 class TestDebugger:
     """Test Debugger."""
 
@@ -117,6 +280,42 @@ class TestDebugger:
 
         assert self.debugger.del_files()
 
+    def test_recorder(self) -> None:
+        """Test DebugRecorder sampling, rotation and compression."""
+        for compress in (False, True):
+            recorder = DebugRecorder(
+                path=DIR_DEBUG,
+                name=self.name,
+                max_bytes=1024,
+                backup_count=2,
+                batch_size=8,
+                compress=compress,
+            )
+            assert recorder.sample()
+            for index in range(100):
+                assert recorder.record(
+                    {"index": index, "path": DIR_DEBUG, "value": random.random()}
+                )
+            recorder.close()
+            assert recorder.record({"index": -1}) is False
+
+            assert recorder.written == 100 and recorder.dropped == 0
+            assert recorder.to_file().is_file()
+            assert recorder.to_file(1).is_file()
+            assert recorder.to_file(3).is_file() is False
+
+            last = recorder.to_file().read_bytes()
+            if compress:
+                last = gzip.decompress(last)
+            assert orjson.loads(last.splitlines()[-1])["index"] == 99
+
+            assert recorder.del_files()
+            assert recorder.to_file().is_file() is False
+
+        recorder = DebugRecorder(path=DIR_DEBUG, name=self.name, sample_rate=0.0)
+        assert not any(recorder.sample() for _ in range(100))
+        recorder.close()
+
 
 if __name__ == "__main__":
     TestDebugger()
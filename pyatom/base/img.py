@@ -13,6 +13,7 @@ import imageio
 import numpy as np
 
 
+from pyatom.base.chars import file_hash
 from pyatom.config import DIR_DEBUG
 
 
@@ -36,9 +37,9 @@ class AbsImage(ABC):
         return file_new.is_file()
 
     def get_hash(self, obj: Union[bytes, Path]) -> str:
-        """Get hash of bytes obj or of file path."""
+        """Get hash of bytes obj or of file path, file streamed by blocks."""
         if isinstance(obj, Path):
-            obj = self.read_bytes(obj)
+            return file_hash(obj, "md5")
         return hashlib.md5(obj).hexdigest()
 
     @staticmethod
@@ -7,7 +7,7 @@
 # mypy: ignore-errors
 
 from pathlib import Path
-from typing import Any, List
+from typing import Any, List, Type
 
 import arrow
 
@@ -16,7 +16,7 @@ from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, Float
 
 from pyatom.config import DIR_DEBUG
 
@@ -141,7 +141,7 @@ class Database:
             self.session.rollback()  # type:ignore
         return 0
 
-    def add_bulk(self, obj_table: Base, dict_items: List[dict]) -> bool:
+    def add_bulk(self, obj_table: Type[Base], dict_items: List[dict]) -> bool:
         """
         Add bulk data using orm function, thread_safe session method
 
@@ -358,6 +358,25 @@ class TableDomain(Base):
         return f"<TableDomain(id={self.id}, country='{self.country}', netloc='{self.netloc}', root={self.root})>"
 
 
+class TableAddress(Base):
+    """Address table for bulk geolocation results"""
+
+    __tablename__ = "TableAddress"
+    __table_args__ = {"comment": "Table.Address"}
+
+    id = Column(Integer, nullable=False, primary_key=True, autoincrement=True)
+    ipaddr = Column(String(45), nullable=False, index=True)
+    country = Column(String(2), nullable=False, index=True)
+    state = Column(String(127), nullable=False)
+    city = Column(String(127), nullable=False)
+    street = Column(String(255), nullable=False)
+    postal = Column(String(15), nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    time_zone = Column(String(63), nullable=False)
+    utc_offset = Column(Integer, nullable=False)
+
+
 class TestDatabase:
     """Test Database ORM Operation."""
 
@@ -203,15 +203,25 @@ class Downloader:
         base = "https://storage.googleapis.com/chromium-browser-snapshots"
         return f"{base}/{self.os_prefix}/{chrome_version}/chrome-linux.zip"
 
-    def download_exe(self, chrome_version: str = "") -> bool:
-        """Dwonload executable file."""
+    def download_exe(self, chrome_version: str = "", sha256: str = "") -> bool:
+        """Dwonload executable file.
+
+        Archive spooled to disk beyond threshold instead of held in memory,
+        extracted in parallel, executable verified if `sha256` provided.
+        Raise IOError on sha256 mismatch, after removing extracted files.
+        """
         chrome_version = chrome_version or self.chrome_version
         url = self.remote_url(chrome_version)
-        data = self.http.download_bytes(url=url)
-        self.http.unzip(data, self.dir_install / chrome_version)
+        with self.http.download_spooled(url=url) as data:
+            self.http.unzip(data, self.dir_install / chrome_version)
         exe = executable(self.dir_chrome, chrome_version)
+        if not exe.is_file():
+            return False
+        if sha256 and self.http.file_sha256(exe) != sha256:
+            self._cleanup_only(chrome_version)
+            raise IOError(f"sha256 mismatch: {exe}")
         exe.chmod(exe.stat().st_mode | stat.S_IXOTH | stat.S_IXGRP | stat.S_IXUSR)
-        return exe.is_file()
+        return True
 
     @staticmethod
     def _gen_random_cdc() -> bytes:
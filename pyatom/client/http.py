@@ -1,29 +1,238 @@
 """
     Doc string for http client
+
+    One Http core with pluggable transports:
+        - RequestsTransport: `requests.Session`, default
+        - HttpxTransport: `httpx.Client`, HTTP/2 multiplexing to one host
+        - AsyncHttpxTransport: `httpx.AsyncClient`, for `AsyncHttp`
 """
 
+import asyncio
+import ssl
+import subprocess
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from http.cookiejar import DefaultCookiePolicy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 import arrow
 import orjson
 import requests
 from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
+from requests.structures import CaseInsensitiveDict
 
 from pyatom.base.io import IO
-from pyatom.base.debug import Debugger
+from pyatom.base.debug import Debugger, DebugRecorder
 from pyatom.base.log import Logger, init_logger
 from pyatom.config import ConfigManager
+from pyatom.config import DIR_DEBUG
 
 
 __all__ = (
+    "Transport",
+    "RequestsTransport",
+    "HttpxTransport",
+    "AsyncHttpxTransport",
+    "shared_transport",
     "Http",
+    "AsyncHttp",
     "Response",
 )
 
 
-class Http:
-    """HTTP Client for requests"""
+class Transport(ABC):
+    """Abstract Transport to send requests for Http client.
+
+    `session` hold headers and cookies, `errors` is tuple of exceptions
+    raised by `request` for network failure.
+    """
+
+    errors: tuple = ()
+    proxy_url: str = ""
+
+    @property
+    @abstractmethod
+    def session(self) -> Any:
+        """Get underlying session with `headers` and `cookies`."""
+
+    @abstractmethod
+    def request(self, method: str, url: str, **kwargs: Any) -> Any:
+        """Send request, return response."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Close connections."""
+
+    async def aclose(self) -> None:
+        """Close connections inside running event loop, default by `close`."""
+        self.close()
+
+    def block_cookies(self) -> None:
+        """Stop session from storing response cookies, for shared session."""
+        jar = getattr(self.session.cookies, "jar", self.session.cookies)
+        jar.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+
+class RequestsTransport(Transport):
+    """Transport by `requests.Session`, HTTP/1.1 keep-alive."""
+
+    errors = (requests.RequestException,)
+
+    def __init__(
+        self, user_agent: str = "", proxy_url: str = "", pool_size: int = 10
+    ) -> None:
+        """Init requests session with connection pool size."""
+        self.proxy_url = proxy_url
+        self._session = requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        if user_agent:
+            self._session.headers.update({"User-Agent": user_agent})
+
+        if proxy_url:
+            self._session.proxies = {
+                "http": proxy_url,
+                "https": proxy_url,
+            }
+
+    @property
+    def session(self) -> requests.Session:
+        """Get requests session."""
+        return self._session
+
+    def request(self, method: str, url: str, **kwargs: Any) -> Response:
+        """Send request by requests session."""
+        return self._session.request(method, url, **kwargs)
+
+    def close(self) -> None:
+        """Close requests session."""
+        self._session.close()
+
+
+class HttpxTransport(Transport):
+    """Transport by `httpx.Client`, require `httpx`, and `h2` for HTTP/2.
+
+    Response is `httpx.Response`, compatible with `requests.Response` for
+    `status_code`, `url`, `text`, `headers`, `cookies` and `json()`.
+    """
+
+    client_cls = "Client"
+
+    def __init__(
+        self,
+        user_agent: str = "",
+        proxy_url: str = "",
+        pool_size: int = 10,
+        http2: bool = True,
+        verify: Any = True,
+    ) -> None:
+        """Init httpx client, `verify` as bool or `ssl.SSLContext`."""
+        import httpx  # pylint: disable=import-outside-toplevel
+
+        self.errors = (httpx.HTTPError,)
+        self.proxy_url = proxy_url
+
+        headers = {"User-Agent": user_agent} if user_agent else {}
+        limits = httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size
+        )
+        self._session = getattr(httpx, self.client_cls)(
+            http2=http2,
+            proxy=proxy_url or None,
+            headers=headers,
+            limits=limits,
+            verify=verify,
+            follow_redirects=True,
+        )
+
+    @property
+    def session(self) -> Any:
+        """Get httpx client."""
+        return self._session
+
+    @staticmethod
+    def to_kwargs(kwargs: dict) -> dict:
+        """Translate requests style keyword arguments for httpx."""
+        kwargs = dict(kwargs)
+        if "allow_redirects" in kwargs:
+            kwargs["follow_redirects"] = kwargs.pop("allow_redirects")
+        if isinstance(kwargs.get("data"), (str, bytes)):
+            kwargs["content"] = kwargs.pop("data")
+        kwargs.pop("stream", None)
+        return kwargs
+
+    def request(self, method: str, url: str, **kwargs: Any) -> Any:
+        """Send request by httpx client."""
+        return self._session.request(method, url, **self.to_kwargs(kwargs))
+
+    def close(self) -> None:
+        """Close httpx client."""
+        self._session.close()
+
+
+class AsyncHttpxTransport(HttpxTransport):
+    """Transport by `httpx.AsyncClient`, `request` return awaitable."""
+
+    client_cls = "AsyncClient"
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> Any:
+        """Send request by httpx async client."""
+        return await self._session.request(method, url, **self.to_kwargs(kwargs))
+
+    def close(self) -> None:
+        """Close httpx async client, use `aclose` inside running event loop."""
+        asyncio.run(self._session.aclose())
+
+    async def aclose(self) -> None:
+        """Close httpx async client."""
+        await self._session.aclose()
+
+
+_SHARED: dict[tuple[str, bool], Transport] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_transport(
+    proxy_url: str = "", http2: bool = False, pool_size: int = 20
+) -> Transport:
+    """Get process-wide shared transport for proxy_url, create if not exists.
+
+    Connections kept alive and reused by all callers, so API wrappers pay
+    TCP and TLS handshake once per host. Session never store cookies,
+    callers pass `headers` and cookies per request instead.
+    """
+    key = (proxy_url, http2)
+    with _SHARED_LOCK:
+        transport = _SHARED.get(key)
+        if transport is None:
+            if http2:
+                transport = HttpxTransport(
+                    proxy_url=proxy_url, pool_size=pool_size, http2=True
+                )
+            else:
+                transport = RequestsTransport(
+                    proxy_url=proxy_url, pool_size=pool_size
+                )
+            transport.block_cookies()
+            _SHARED[key] = transport
+        return transport
+
+
+class BaseHttp:
+    """Base HTTP Client for headers, cookies and debugging, without requests.
+
+    Headers and cookies kept on client and sent per request, so clients
+    sharing one transport never see each other's state.
+    """
 
     __slots__ = (
         "user_agent",
@@ -31,8 +240,10 @@ class Http:
         "time_out",
         "logger",
         "debugger",
-        "session",
-        "data",
+        "recorder",
+        "transport",
+        "headers",
+        "cookies",
     )
 
     def __init__(
@@ -42,44 +253,54 @@ class Http:
         logger: Logger,
         time_out: int = 30,
         debugger: Optional[Debugger] = None,
+        recorder: Optional[DebugRecorder] = None,
+        transport: Optional[Transport] = None,
     ) -> None:
-        """Init Http Client."""
+        """Init Http Client.
+
+        Set `recorder` for sampled background recording of `debug=True`
+        requests instead of one synchronous debugger file per request.
+        Set `transport` to choose client library, default by `to_transport`.
+        Passed transport may be shared, so `user_agent` sent per request and
+        `proxy_url` must be empty or same as the transport one.
+        """
 
         self.user_agent = user_agent
         self.proxy_url = proxy_url
         self.time_out = time_out
         self.logger = logger
         self.debugger = debugger
+        self.recorder = recorder
 
-        self.session = requests.Session()
+        if transport is None:
+            transport = self.to_transport(user_agent=user_agent, proxy_url=proxy_url)
+        elif proxy_url and proxy_url != transport.proxy_url:
+            raise ValueError(f"proxy_url conflict with transport: {proxy_url}")
+        self.transport = transport
 
-        if user_agent:
-            headers = {"User-Agent": user_agent}
-            self.session.headers.update(headers)
+        self.headers: CaseInsensitiveDict = CaseInsensitiveDict()
+        self.cookies = RequestsCookieJar()
 
-        if proxy_url:
-            self.session.proxies = {
-                "http": proxy_url,
-                "https": proxy_url,
-            }
+    @staticmethod
+    def to_transport(user_agent: str, proxy_url: str) -> Transport:
+        """Generate default transport."""
+        return RequestsTransport(user_agent=user_agent, proxy_url=proxy_url)
 
-        self.data: dict = {"time_stamp": 0, "time_str": "", "req": {}, "res": {}}
+    @property
+    def session(self) -> Any:
+        """Get transport session."""
+        return self.transport.session
 
     def header_set(self, key: str, value: Optional[str] = None) -> None:
-        """set header for session"""
+        """set header for following requests"""
         if value is not None:
-            self.session.headers[key] = value
+            self.headers[key] = value
         else:
-            if key in self.session.headers.keys():
-                del self.session.headers[key]
+            self.headers.pop(key, None)
 
     def header_get(self, key: str) -> str:
         """Get header value for key string."""
-        if key and key in self.session.headers.keys():
-            value = self.session.headers[key]
-            if value:
-                return value
-        return ""
+        return str(self.headers.get(key) or "")
 
     def h_accept(self, value: str = "*/*") -> None:
         """set heaer `Accept`"""
@@ -124,97 +345,142 @@ class Http:
         self.header_set("Content-Type", value)
 
     def cookie_set(self, key: str, value: Optional[str]) -> None:
-        """set cookie for session"""
-        self.session.cookies.set(key, value)
+        """set cookie for following requests"""
+        self.cookies.set(key, value)
 
     def cookie_load(self, file_cookie: Path) -> None:
-        """load session cookie from local file"""
+        """load client cookie from local file"""
         if file_cookie.is_file():
             cookie = IO.load_dict(file_cookie)
-            self.session.cookies.update(cookie)
+            self.cookies.update(cookie)
 
     def cookie_save(self, file_cookie: Path) -> None:
-        """save session cookies into local file"""
-        IO.save_dict(file_cookie, dict(self.session.cookies))
+        """save client cookies into local file"""
+        IO.save_dict(file_cookie, dict(self.cookies))
+
+    def cookie_header(self, url: str) -> str:
+        """Get `Cookie` header value of client cookies matching url."""
+        request = urllib.request.Request(url)
+        self.cookies.add_cookie_header(request)
+        return str(request.get_header("Cookie") or "")
+
+    def prepare_headers(self, url: str, **kwargs: Any) -> dict:
+        """Merge user agent, client headers and cookies for one request."""
+        headers: CaseInsensitiveDict = CaseInsensitiveDict()
+        if self.user_agent:
+            headers["User-Agent"] = self.user_agent
+        headers.update(self.headers)
 
-    def prepare_headers(self, **kwargs: Any) -> None:
-        """set headers for following request"""
         if kwargs.get("json") is not None:
-            self.h_json()
+            headers["Content-Type"] = "application/json; charset=UTF-8"
         elif kwargs.get("data") is not None:
-            self.h_data()
+            headers["Content-Type"] = "application/x-www-form-urlencoded; charset=UTF-8"
 
-        headers = kwargs.get("headers")
-        if headers is not None:
-            for key, value in headers.items():
-                self.header_set(key, value)
+        cookie = self.cookie_header(url)
+        if cookie:
+            headers["Cookie"] = cookie
+        headers.update(kwargs.get("headers") or {})
+        return dict(headers)
+
+    def prepare(
+        self, method: str, url: str, debug: bool = False, **kwargs: Any
+    ) -> tuple[dict, dict]:
+        """Prepare headers and debug data, Return tuple of (data, kwargs).
+
+        `data` is empty dict unless request sampled for debugging.
+        """
+        if debug and self.recorder:
+            debug = self.recorder.sample()
+        kwargs["headers"] = self.prepare_headers(url, **kwargs)
+        data = self.save_req(method, url, debug, **kwargs)
+        if not kwargs.get("timeout", None):
+            kwargs["timeout"] = self.time_out
+        return data, kwargs
+
+    def finish(self, response: Any, data: Optional[dict] = None) -> None:
+        """Logging, keep response cookies and save response."""
+        code = response.status_code
+        length = len(response.text)
+        self.logger.info("[%d]<%d>%s", code, length, response.url)
+        self.cookies.update(getattr(response.cookies, "jar", response.cookies))
+        if data:
+            self.save_res(response, data)
 
     def save_req(
         self, method: str, url: str, debug: bool = False, **kwargs: Any
-    ) -> None:
-        """save request information into self.data"""
-        if debug and self.debugger:
-            _kwargs = {}
-            for key, value in kwargs.items():
-                try:
-                    orjson.dumps({"v": value})
-                except TypeError:
-                    value = str(value)
-                _kwargs[key] = value
-
-            cookies = dict(self.session.cookies.items())
-            headers = dict(self.session.headers.items())
-            now = arrow.now()
-            time_stamp = int(now.timestamp())
-            time_str = now.format("YYYY-MM-DD HH:mm:ss")
-            self.data["time_stamp"] = time_stamp
-            self.data["time_str"] = time_str
-            self.data["req"] = {
+    ) -> dict:
+        """save request information, Return debug data or empty dict."""
+        if not (debug and (self.debugger or self.recorder)):
+            return {}
+
+        _kwargs = {}
+        for key, value in kwargs.items():
+            try:
+                orjson.dumps({"v": value})
+            except TypeError:
+                value = str(value)
+            _kwargs[key] = value
+
+        now = arrow.now()
+        data = {
+            "time_stamp": int(now.timestamp()),
+            "time_str": now.format("YYYY-MM-DD HH:mm:ss"),
+            "req": {
                 "method": method,
                 "url": url,
-                "kwargs": kwargs,
-                "headers": headers,
-                "cookies": cookies,
-            }
+                "kwargs": _kwargs,
+                "headers": dict(kwargs.get("headers") or {}),
+                "cookies": dict(self.cookies.items()),
+            },
+            "res": {},
+        }
+        if self.debugger and not self.recorder:
             self.debugger.id_add()
-            self.debugger.save(self.data)
+            self.debugger.save(data)
+        return data
 
-    def save_res(self, response: Response, debug: bool = False) -> None:
-        """save http response into self.data"""
-        if debug and self.debugger:
-            cookies = dict(response.cookies.items())
-            headers = dict(response.headers.items())
-            try:
-                res_json = orjson.loads(response.text)
-            except orjson.JSONDecodeError:
-                res_json = {}
-            self.data["res"] = {
-                "status_code": response.status_code,
-                "url": response.url,
-                "headers": headers,
-                "cookies": cookies,
-                "text": response.text,
-                "json": res_json,
-            }
-            self.debugger.save(self.data)
+    def save_res(self, response: Any, data: dict) -> None:
+        """save http response into debug data"""
+        cookies = dict(response.cookies.items())
+        headers = dict(response.headers.items())
+        try:
+            res_json = orjson.loads(response.text)
+        except orjson.JSONDecodeError:
+            res_json = {}
+        data["res"] = {
+            "status_code": response.status_code,
+            "url": str(response.url),
+            "headers": headers,
+            "cookies": cookies,
+            "text": response.text,
+            "json": res_json,
+        }
+        if self.recorder:
+            self.recorder.record(dict(data))
+        elif self.debugger:
+            self.debugger.save(data)
+
+    def close(self) -> None:
+        """Close transport connections."""
+        self.transport.close()
+
+
+class Http(BaseHttp):
+    """HTTP Client for requests"""
+
+    __slots__ = ()
 
     def req(
         self, method: str, url: str, debug: bool = False, **kwargs: Any
     ) -> Optional[Response]:
         """Preform HTTP Request"""
-        response = None
+        response: Optional[Response] = None
         try:
-            self.prepare_headers(**kwargs)
-            self.save_req(method, url, debug, **kwargs)
-            if not kwargs.get("timeout", None):
-                kwargs["timeout"] = self.time_out
-            with self.session.request(method, url, **kwargs) as response:
-                code = response.status_code
-                length = len(response.text)
-                self.logger.info("[%d]<%d>%s", code, length, response.url)
-                self.save_res(response, debug)
-                return response
-        except requests.RequestException as err:
+            data, kwargs = self.prepare(method, url, debug, **kwargs)
+            response = self.transport.request(method, url, **kwargs)
+            self.finish(response, data)
+            return response
+        except self.transport.errors as err:
             self.logger.exception(err)
         return response
 
@@ -257,23 +523,84 @@ class Http:
         return self.req("DELETE", url, debug=debug, **kwargs)
 
 
+class AsyncHttp(BaseHttp):
+    """Async HTTP Client, default transport `AsyncHttpxTransport`."""
+
+    __slots__ = ()
+
+    @staticmethod
+    def to_transport(user_agent: str, proxy_url: str) -> Transport:
+        """Generate default async transport."""
+        return AsyncHttpxTransport(user_agent=user_agent, proxy_url=proxy_url)
+
+    async def req(
+        self, method: str, url: str, debug: bool = False, **kwargs: Any
+    ) -> Optional[Any]:
+        """Preform HTTP Request"""
+        response = None
+        try:
+            data, kwargs = self.prepare(method, url, debug, **kwargs)
+            response = await self.transport.request(method, url, **kwargs)
+            self.finish(response, data)
+            return response
+        except self.transport.errors as err:
+            self.logger.exception(err)
+        return response
+
+    async def get(self, url: str, debug: bool = False, **kwargs: Any) -> Optional[Any]:
+        """HTTP GET"""
+        return await self.req("GET", url, debug=debug, **kwargs)
+
+    async def post(
+        self, url: str, debug: bool = False, **kwargs: Any
+    ) -> Optional[Any]:
+        """HTTP POST"""
+        return await self.req("POST", url, debug=debug, **kwargs)
+
+    async def head(
+        self, url: str, debug: bool = False, **kwargs: Any
+    ) -> Optional[Any]:
+        """HTTP HEAD"""
+        return await self.req("HEAD", url, debug=debug, **kwargs)
+
+    async def put(self, url: str, debug: bool = False, **kwargs: Any) -> Optional[Any]:
+        """HTTP PUT"""
+        return await self.req("PUT", url, debug=debug, **kwargs)
+
+    async def patch(
+        self, url: str, debug: bool = False, **kwargs: Any
+    ) -> Optional[Any]:
+        """HTTP PATCH"""
+        return await self.req("PATCH", url, debug=debug, **kwargs)
+
+    async def delete(
+        self, url: str, debug: bool = False, **kwargs: Any
+    ) -> Optional[Any]:
+        """HTTP DELETE"""
+        return await self.req("DELETE", url, debug=debug, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close async transport connections."""
+        await self.transport.aclose()
+
+
 class TestHttp:
     """TestCase for Http Client and Chrome Client."""
 
-    dir_app = Path(__file__).parent
-    file_config = Path(dir_app.parent.parent, "protect", "config.json")
+    file_config = DIR_DEBUG.parent / "protect" / "config.json"
     config = ConfigManager().load(file_config)
 
     logger = init_logger(name="test")
-    debugger = Debugger(path=dir_app, name="test")
+    debugger = Debugger(path=DIR_DEBUG, name="test")
 
-    def to_client(self) -> Http:
+    def to_client(self, transport: Optional[Transport] = None) -> Http:
         """Get Http Client."""
         return Http(
             user_agent=self.config.user_agent,
             proxy_url=self.config.proxy_url,
             logger=self.logger,
             debugger=self.debugger,
+            transport=transport,
         )
 
     def test_headers(self) -> None:
@@ -320,18 +647,47 @@ class TestHttp:
             client.cookie_set(key, value)
 
         for key, value in cookie_dict.items():
-            assert client.session.cookies.get(key) == value
+            assert client.cookies.get(key) == value
+        assert "name=Ben" in client.cookie_header("http://httpbin.org/get")
 
-        file_cookie = Path(self.dir_app, "cookies.json")
+        file_cookie = DIR_DEBUG / "test.cookies.json"
         client.cookie_save(file_cookie)
         client = self.to_client()
         client.cookie_load(file_cookie)
 
         for key, value in cookie_dict.items():
-            assert client.session.cookies.get(key) == value
+            assert client.cookies.get(key) == value
 
         assert IO.file_del(file_cookie) is True
 
+    def test_shared_transport(self) -> None:
+        """test user agent, headers, cookies and proxy with shared transport"""
+        transport = RequestsTransport()
+        transport.block_cookies()
+        client = Http("agent", "", self.logger, transport=transport)
+        other = Http("other", "", self.logger, transport=transport)
+        client.h_refer("http://example.com/")
+        client.cookie_set("name", "Ben")
+        assert transport.session.headers["User-Agent"] != "agent"
+        assert "Referer" not in transport.session.headers
+
+        _, kwargs = client.prepare("POST", "http://httpbin.org/post", json={})
+        assert kwargs["headers"]["User-Agent"] == "agent"
+        assert kwargs["headers"]["Referer"] == "http://example.com/"
+        assert kwargs["headers"]["Cookie"] == "name=Ben"
+        assert "application/json" in kwargs["headers"]["Content-Type"]
+        assert client.header_get("Content-Type") == ""
+
+        _, kwargs = other.prepare("GET", "http://httpbin.org/get")
+        assert kwargs["headers"] == {"User-Agent": "other"}
+
+        try:
+            Http("agent", "http://127.0.0.1:1", self.logger, transport=transport)
+            assert False
+        except ValueError:
+            pass
+        transport.close()
+
     def test_http_requests(self) -> None:
         """test Http virious request methods"""
         client = self.to_client()
@@ -358,6 +714,32 @@ class TestHttp:
         response = client.put(url_put)
         assert response and response.json().get("url") == url_put
 
+    def test_http_transports(self) -> None:
+        """test Http with httpx transport over HTTP/2, and AsyncHttp"""
+        transport = HttpxTransport(proxy_url=self.config.proxy_url, http2=True)
+        client = self.to_client(transport=transport)
+        client.h_accept("application/json")
+
+        url_get = "https://httpbin.org/get"
+        response = client.get(url_get)
+        assert response is not None and response.json().get("url") == url_get
+        client.close()
+
+        async def fetch_all(number: int = 5) -> list:
+            """Fetch url concurrently by AsyncHttp."""
+            client = AsyncHttp(
+                user_agent=self.config.user_agent,
+                proxy_url=self.config.proxy_url,
+                logger=self.logger,
+            )
+            tasks = [client.get(url_get) for _ in range(number)]
+            results = await asyncio.gather(*tasks)
+            await client.aclose()
+            return results
+
+        results = asyncio.run(fetch_all())
+        assert all(res is not None and res.status_code == 200 for res in results)
+
     def test_http_debugger(self) -> None:
         """test Http debugger"""
         client = self.to_client()
@@ -366,9 +748,96 @@ class TestHttp:
         assert client.debugger is not None
         assert client.debugger.id_str != ""
 
-        print(orjson.dumps(client.data, option=orjson.OPT_INDENT_2))
+        data, _ = client.prepare("GET", url, debug=True)
+        assert data["req"]["url"] == url
+        print(orjson.dumps(data, option=orjson.OPT_INDENT_2))
         assert client.debugger.del_files()
 
+    def test_http_recorder(self) -> None:
+        """test Http background debug recorder"""
+        client = self.to_client()
+        client.recorder = DebugRecorder(path=DIR_DEBUG, name="test.recorder")
+        url = "http://httpbin.org/get"
+        for _ in range(3):
+            client.get(url, debug=True)
+        client.recorder.close()
+        assert client.recorder.written == 3
+        assert len(IO.load_line(client.recorder.to_file())) == 3
+        assert client.recorder.del_files()
+
+    @staticmethod
+    def tls_server(dir_cert: Path) -> tuple[ThreadingHTTPServer, Path]:
+        """Start local HTTPS server with self-signed certificate by `openssl`.
+
+        Server speak HTTP/1.1 only, ALPN advertise `http/1.1` without `h2`.
+        """
+        file_key = dir_cert / "test.key.pem"
+        file_cert = dir_cert / "test.cert.pem"
+        args = "openssl req -x509 -newkey rsa:2048 -nodes -days 1 -subj /CN=127.0.0.1"
+        args = f"{args} -addext subjectAltName=IP:127.0.0.1"
+        subprocess.run(
+            args.split() + ["-keyout", str(file_key), "-out", str(file_cert)],
+            check=True,
+            capture_output=True,
+        )
+
+        class Handler(BaseHTTPRequestHandler):
+            """Keep-alive handler with small json body."""
+
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                """Response small json body."""
+                body = b'{"ok": true}'
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                """Silent."""
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(file_cert, file_key)
+        context.set_alpn_protocols(["http/1.1"])
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        file_key.unlink(missing_ok=True)
+        return server, file_cert
+
+    def test_bench_shared_transport(self, number: int = 50) -> None:
+        """Benchmark per-call latency of bare requests vs shared transports."""
+        server, file_cert = self.tls_server(DIR_DEBUG)
+        url = f"https://127.0.0.1:{server.server_port}/"
+        verify = str(file_cert)
+
+        def per_call(func: Callable) -> float:
+            """Average milliseconds per call."""
+            start = time.perf_counter()
+            for _ in range(number):
+                assert func().status_code == 200
+            return (time.perf_counter() - start) * 1000 / number
+
+        bare = per_call(lambda: requests.get(url, verify=verify, timeout=30))
+        pooled = per_call(
+            lambda: shared_transport().request("GET", url, verify=verify, timeout=30)
+        )
+        context = ssl.create_default_context(cafile=verify)
+        transport = HttpxTransport(http2=True, verify=context)
+        version = transport.request("GET", url, timeout=30).http_version
+        httpx_call = per_call(lambda: transport.request("GET", url, timeout=30))
+        transport.close()
+
+        server.shutdown()
+        file_cert.unlink(missing_ok=True)
+
+        print(f"bare requests.get: {bare:.2f} ms/call")
+        print(f"shared requests transport: {pooled:.2f} ms/call")
+        print(f"httpx transport ({version} negotiated): {httpx_call:.2f} ms/call")
+
 
 if __name__ == "__main__":
     TestHttp()
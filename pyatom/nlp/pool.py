@@ -0,0 +1,323 @@
+"""
+    Multi-process Paraphrase Worker Pool with micro-batching
+"""
+
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import count
+from typing import Any, Callable
+
+from pyatom.nlp.spinner import Pegasus
+
+__all__ = ("SpinnerPool",)
+
+
+def init_spinner(factory: Callable[[], Any], spinner: Any, num_threads: int) -> Any:
+    """Create spinner if not inherited, load model, then limit torch threads.
+
+    Model loaded before setting threads, so torch imported by then even with
+    `spawn` start method or without preload. Cache file already loaded is
+    never saved by workers, which would race on the same file.
+    """
+    if spinner is None:
+        spinner = factory()
+    if getattr(spinner, "file_cache", None):
+        spinner.file_cache = None
+    if hasattr(spinner, "load_model"):
+        spinner.load_model()
+    if num_threads and "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(num_threads)
+    return spinner
+
+
+def collect_batch(jobs: Any, batch_size: int, max_wait: float) -> tuple[list, bool]:
+    """Get micro batch of jobs waiting at most `max_wait`, and if running."""
+    job = jobs.get()
+    if job is None:
+        return [], False
+    batch = [job]
+    deadline = time.monotonic() + max_wait
+    while len(batch) < batch_size:
+        try:
+            job = jobs.get(timeout=max(deadline - time.monotonic(), 0))
+        except queue.Empty:
+            break
+        if job is None:
+            return batch, False
+        batch.append(job)
+    return batch, True
+
+
+def run_batch(spinner: Any, batch: list, results: Any, batch_size: int) -> None:
+    """Generate batch grouped by params, put results or errors per job."""
+    groups: defaultdict = defaultdict(list)
+    for job_id, text, num_returns, num_beams in batch:
+        groups[(num_returns, num_beams)].append((job_id, text))
+    for (num_returns, num_beams), items in groups.items():
+        try:
+            responses = spinner.get_responses(
+                [text for _, text in items],
+                num_returns=num_returns,
+                num_beams=num_beams,
+                batch_size=batch_size,
+            )
+            results.put(
+                [(job_id, res, "") for (job_id, _), res in zip(items, responses)]
+            )
+        except Exception as err:  # pylint: disable=broad-except
+            results.put([(job_id, [], repr(err)) for job_id, _ in items])
+
+
+def work(
+    factory: Callable[[], Any],
+    spinner: Any,
+    jobs: Any,
+    results: Any,
+    batch_size: int,
+    max_wait: float,
+    num_threads: int,
+) -> None:
+    """Worker process loop, collect jobs into micro batch, stop at `None`."""
+    spinner = init_spinner(factory, spinner, num_threads)
+    running = True
+    while running:
+        batch, running = collect_batch(jobs, batch_size, max_wait)
+        if batch:
+            run_batch(spinner, batch, results, batch_size)
+    if hasattr(spinner, "close"):
+        spinner.close()
+
+
+class SpinnerPool:
+    """Multi-process Paraphrase Worker Pool.
+
+    Each worker process holds one spinner model. Sentences submitted by many
+    callers put into one job queue, worker collects up to `batch_size` jobs
+    waiting at most `max_wait` seconds, and generates them in one batch.
+
+    With `fork` start method, model loaded once in parent process before
+    workers started, weights shared by copy-on-write.
+
+    If any worker process died, e.g. killed for out of memory, pool is
+    broken: pending futures failed and new submit refused.
+    """
+
+    poll = 0.5
+
+    def __init__(
+        self,
+        workers: int = 2,
+        batch_size: int = 8,
+        max_wait: float = 0.01,
+        factory: Callable[[], Any] = Pegasus,
+        preload: bool = True,
+        num_threads: int = 0,
+    ) -> None:
+        """Init and start worker processes.
+
+        Parameters:
+            :factory:callable, create spinner with `get_responses` method
+            :preload:bool, load model in parent before fork, if supported
+            :num_threads:int, torch threads per worker, 0 for cpu count / workers
+        """
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        spinner = None
+        if context.get_start_method() == "fork":
+            spinner = factory()
+            if preload and hasattr(spinner, "load_model"):
+                spinner.load_model()
+
+        self.jobs = context.Queue()
+        self.results = context.Queue()
+        self.futures: dict[int, Future] = {}
+        self.counter = count()
+        self.lock = threading.Lock()
+        self.closed = False
+        self.broken = False
+
+        num_threads = num_threads or max((os.cpu_count() or 1) // workers, 1)
+        self.processes = [
+            context.Process(
+                target=work,
+                args=(
+                    factory,
+                    spinner,
+                    self.jobs,
+                    self.results,
+                    batch_size,
+                    max_wait,
+                    num_threads,
+                ),
+                daemon=True,
+            )
+            for _ in range(workers)
+        ]
+        for process in self.processes:
+            process.start()
+
+        self.thread = threading.Thread(target=self._collect, daemon=True)
+        self.thread.start()
+
+    def __enter__(self) -> "SpinnerPool":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def _collect(self) -> None:
+        """Collector thread, resolve futures by results, stop at `None`.
+
+        Check worker processes alive every `poll` seconds without result.
+        """
+        while True:
+            try:
+                items = self.results.get(timeout=self.poll)
+            except queue.Empty:
+                if self.closed or all(x.is_alive() for x in self.processes):
+                    continue
+                self._fail("SpinnerPool broken, worker process died")
+                return
+            if items is None:
+                break
+            for job_id, response, error in items:
+                with self.lock:
+                    future = self.futures.pop(job_id, None)
+                if future is None:
+                    continue
+                if error:
+                    future.set_exception(RuntimeError(error))
+                else:
+                    future.set_result(response)
+
+    def _fail(self, error: str) -> None:
+        """Mark pool broken, fail all pending futures."""
+        with self.lock:
+            self.broken = True
+            futures, self.futures = self.futures, {}
+        for future in futures.values():
+            future.set_exception(RuntimeError(error))
+
+    def submit(
+        self, input_text: str, num_returns: int = 10, num_beams: int = 10
+    ) -> Future:
+        """Submit input text, get Future of paraphrase response list."""
+        future: Future = Future()
+        job_id = next(self.counter)
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("SpinnerPool closed")
+            if self.broken:
+                raise RuntimeError("SpinnerPool broken, worker process died")
+            self.futures[job_id] = future
+        self.jobs.put((job_id, input_text, min(num_returns, num_beams), num_beams))
+        return future
+
+    def get_response(
+        self, input_text: str, num_returns: int = 10, num_beams: int = 10
+    ) -> list[str]:
+        """Get list of paraphrase response for input text string."""
+        return list(self.submit(input_text, num_returns, num_beams).result())
+
+    def get_responses(
+        self, input_texts: list[str], num_returns: int = 10, num_beams: int = 10
+    ) -> list[list[str]]:
+        """Get list of paraphrase response for each input text string."""
+        futures = [self.submit(x, num_returns, num_beams) for x in input_texts]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        """Finish queued jobs and stop worker processes."""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        for _ in self.processes:
+            self.jobs.put(None)
+        for process in self.processes:
+            process.join()
+        self.results.put(None)
+        self.thread.join()
+
+
+class TestSpinnerPool:
+    """TestCase for SpinnerPool."""
+
+    class EchoSpinner:
+        """Spinner with fixed cost for each batch, exit process on `crash`."""
+
+        def __init__(self, latency: float = 0.02) -> None:
+            self.latency = latency
+
+        def get_responses(
+            self,
+            input_texts: list[str],
+            num_returns: int = 10,
+            num_beams: int = 10,
+            batch_size: int = 8,
+        ) -> list[list[str]]:
+            """Echo input text with batch size and pid."""
+            if "crash" in input_texts:
+                os._exit(1)  # pylint: disable=protected-access
+            if "fail" in input_texts:
+                raise ValueError("fail")
+            time.sleep(self.latency)
+            return [
+                [f"{text}|{len(input_texts)}|{os.getpid()}|{num_beams}"] * num_returns
+                for text in input_texts
+            ]
+
+    def test_pool(self) -> None:
+        """Test results, micro batch from concurrent callers and errors."""
+        with SpinnerPool(workers=2, batch_size=8, factory=self.EchoSpinner) as app:
+            texts = [f"text {index}" for index in range(64)]
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                results = list(
+                    executor.map(lambda x: app.get_response(x, 2, 3), texts)
+                )
+            sizes, pids = set(), set()
+            for text, result in zip(texts, results):
+                assert len(result) == 2
+                echo, size, pid, num_beams = result[0].split("|")
+                assert echo == text and num_beams == "3"
+                sizes.add(int(size))
+                pids.add(pid)
+            assert max(sizes) > 1 and len(pids) == 2
+
+            future = app.submit("fail")
+            assert isinstance(future.exception(), RuntimeError)
+            assert app.get_responses(["a", "b"], 1, 1)[1][0].startswith("b|")
+        assert all(not process.is_alive() for process in app.processes)
+
+    def test_pool_broken(self) -> None:
+        """Test pending futures failed when worker process died."""
+        with SpinnerPool(workers=1, max_wait=0.1, factory=self.EchoSpinner) as app:
+            futures = [app.submit(text) for text in ("crash", "other")]
+            for future in futures:
+                assert isinstance(future.exception(timeout=10), RuntimeError)
+            try:
+                app.submit("after")
+                assert False
+            except RuntimeError:
+                pass
+
+    def test_bench_pool(self, number: int = 200) -> None:
+        """Benchmark single sentence callers with and without micro batch."""
+        texts = [f"text {index}" for index in range(number)]
+        for batch_size in (1, 8, 32):
+            with SpinnerPool(2, batch_size, factory=self.EchoSpinner) as app:
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=64) as executor:
+                    list(executor.map(app.get_response, texts))
+                speed = number / (time.perf_counter() - start)
+            print(f"batch_size <{batch_size}>: {speed:.0f} sentences/s")
+
+
+if __name__ == "__main__":
+    TestSpinnerPool()
@@ -2,8 +2,18 @@
     cls for text spinner
 """
 
-import torch
-from transformers import PegasusForConditionalGeneration, PegasusTokenizer
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from pyatom.base.io import IO
+from pyatom.config import DIR_DEBUG
 
 __all__ = ("Pegasus",)
 
@@ -13,44 +23,287 @@ class Pegasus:
     """
     Pegasus Paraphrase Generator:
         :https://huggingface.co/tuner007/pegasus_paraphrase
+
+    `torch` and `transformers` imported, model loaded on first generating.
+
+    Backend for CPU inference:
+        :fp32: original pytorch model
+        :int8: pytorch model with linear layers dynamic quantized into int8
+        :onnx: ONNX Runtime model exported by `optimum[onnxruntime]`
     """
 
-    def __init__(self) -> None:
-        """Init Spinner."""
-        self.model_remote = "tuner007/pegasus_paraphrase"
-        self.torch_device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.tokenizer = PegasusTokenizer.from_pretrained(self.model_remote)
+    max_length = 60
+    model_remote = "tuner007/pegasus_paraphrase"
+    backends = ("fp32", "int8", "onnx")
 
-        pegasus = PegasusForConditionalGeneration.from_pretrained(self.model_remote)
-        if not pegasus:
-            raise TypeError("PegasusForConditionGeneration is None!")
+    def __init__(
+        self,
+        model_path: Union[str, Path] = "",
+        device: str = "",
+        backend: str = "fp32",
+        num_threads: int = 0,
+        warmup: bool = False,
+        cache_size: int = 4096,
+        file_cache: Optional[Path] = None,
+        save_interval: float = 60.0,
+    ) -> None:
+        """Init Spinner.
 
-        self.model = pegasus.to(self.torch_device)
+        Parameters:
+            :model_path:str or Path, local model directory or hub name
+            :device:str, `cuda` or `cpu`, auto detect if empty
+            :backend:str, `fp32`, `int8` or `onnx`, last two for cpu only
+            :num_threads:int, intra-op threads, 0 for default, torch threads
+                setting is process wide
+            :warmup:bool, load model and run one generating now
+            :cache_size:int, max number of cached responses, 0 for no cache
+            :file_cache:Path, json file to keep cached responses across runs
+            :save_interval:float, min seconds between saving cache file,
+                unsaved responses saved on `close`
+        """
+        if backend not in self.backends:
+            raise ValueError(f"unknown backend: {backend}")
+        if backend != "fp32" and device not in ("", "cpu"):
+            raise ValueError(f"backend {backend} for cpu only")
 
-    def get_response(
-        self, input_text: str, num_returns: int = 10, num_beams: int = 10
-    ) -> list[str]:
-        """Get list of paraphrase response for input text string."""
-        num_returns = min(num_returns, num_beams)
-        if not self.tokenizer:
-            raise TypeError("PegasusTokenizer is None!")
+        self.model_path = str(model_path or self.model_remote)
+        self.device = "cpu" if backend != "fp32" else device
+        self.backend = backend
+        self.num_threads = num_threads
+        self.lock = threading.Lock()
+        self._tokenizer: Any = None
+        self._model: Any = None
+
+        self.cache_size = cache_size
+        self.file_cache = file_cache
+        self.cache: OrderedDict[str, list[str]] = OrderedDict()
+        self.save_interval = save_interval
+        self.unsaved = 0
+        self.saved = time.monotonic()
+        self.load_cache()
+
+        if warmup:
+            self.warm_up()
+
+    def __enter__(self) -> "Pegasus":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    @property
+    def loaded(self) -> bool:
+        """Check if model loaded."""
+        return self._model is not None
+
+    @property
+    def tokenizer(self) -> Any:
+        """Get PegasusTokenizer, load model if not loaded."""
+        self.load_model()
+        return self._tokenizer
+
+    @property
+    def model(self) -> Any:
+        """Get PegasusForConditionalGeneration, load model if not loaded."""
+        self.load_model()
+        return self._model
+
+    @property
+    def torch_device(self) -> str:
+        """Get device of model."""
+        return str(self.model.device)
+
+    def load_model(self) -> None:
+        """Import torch, load tokenizer and model once, thread safe."""
+        if self._model is not None:
+            return
+        with self.lock:
+            if self._model is not None:
+                return
+            # pylint: disable=import-outside-toplevel
+            import torch
+            from transformers import (
+                PegasusForConditionalGeneration,
+                PegasusTokenizer,
+            )
+
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
+
+            local = Path(self.model_path).is_dir()
+            device = self.device or ("cuda" if torch.cuda.is_available() else "cpu")
+            tokenizer = PegasusTokenizer.from_pretrained(
+                self.model_path, local_files_only=local
+            )
+            if self.backend == "onnx":
+                self._tokenizer = tokenizer
+                self._model = self.load_onnx(local)
+                return
+
+            pegasus = PegasusForConditionalGeneration.from_pretrained(
+                self.model_path, local_files_only=local, low_cpu_mem_usage=True
+            )
+            if not pegasus:
+                raise TypeError("PegasusForConditionGeneration is None!")
+
+            pegasus = pegasus.to(device).eval()
+            if self.backend == "int8":
+                pegasus = torch.ao.quantization.quantize_dynamic(
+                    pegasus, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            self._tokenizer = tokenizer
+            self._model = pegasus
+
+    def load_onnx(self, local: bool) -> Any:
+        """Load ONNX Runtime model, export from pytorch model if no onnx file."""
+        # pylint: disable=import-outside-toplevel
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as err:
+            raise ImportError("onnx backend requires optimum[onnxruntime]") from err
+
+        options = onnxruntime.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        export = not (local and any(Path(self.model_path).glob("*.onnx")))
+        return ORTModelForSeq2SeqLM.from_pretrained(
+            self.model_path,
+            export=export,
+            local_files_only=local,
+            provider="CPUExecutionProvider",
+            session_options=options,
+        )
+
+    def warm_up(self) -> float:
+        """Load model and run one short generating, return seconds spent."""
+        start = time.perf_counter()
+        self.generate(["Warm up."], num_returns=1, num_beams=1)
+        return time.perf_counter() - start
+
+    def load_cache(self) -> int:
+        """Load cached responses from file, return number loaded."""
+        if not (self.file_cache and self.file_cache.is_file()):
+            return 0
+        try:
+            items = IO.load_dict(self.file_cache)
+        except ValueError:
+            return 0
+        self.cache.update(items)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return len(items)
+
+    def save_cache(self) -> None:
+        """Save cached responses by replacing, never leave half written file."""
+        if not self.file_cache:
+            return
+        file_tmp = Path(f"{self.file_cache}.tmp")
+        IO.save_dict(file_tmp, dict(self.cache))
+        file_tmp.replace(self.file_cache)
+        self.unsaved = 0
+        self.saved = time.monotonic()
+
+    def update_cache(
+        self, keys: list[str], result: dict[str, list[str]], generated: int
+    ) -> None:
+        """Put responses into LRU cache, save file if `save_interval` passed."""
+        if not self.cache_size:
+            return
+        for key in dict.fromkeys(keys):
+            self.cache[key] = result[key]
+            self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        self.unsaved += generated
+        if time.monotonic() - self.saved >= self.save_interval:
+            self.save_cache()
+
+    def close(self) -> None:
+        """Save cached responses not saved yet."""
+        if self.unsaved:
+            self.save_cache()
+
+    def to_key(self, input_text: str, num_returns: int, num_beams: int) -> str:
+        """Get cache key of input text, generation params, backend and model.
+
+        File cache may be shared by spinners of other backend or model.
+        """
+        params = f"{num_returns}:{num_beams}:{self.max_length}"
+        return f"{self.backend}:{self.model_path}:{params}:{input_text}"
+
+    def generate(
+        self, input_texts: list[str], num_returns: int, num_beams: int
+    ) -> list[list[str]]:
+        """Generate paraphrase for batch of input text, padded to longest."""
+        import torch  # pylint: disable=import-outside-toplevel
 
         batch = self.tokenizer(
-            [input_text],
+            input_texts,
             truncation=True,
             padding="longest",
-            max_length=60,
+            max_length=self.max_length,
             return_tensors="pt",
         ).to(self.torch_device)
-        translated = self.model.generate(
-            **batch,
-            max_length=60,
-            num_beams=num_beams,
-            num_return_sequences=num_returns,
-            temperature=1.5,
-        )
+        with torch.inference_mode():
+            translated = self.model.generate(
+                **batch,
+                max_length=self.max_length,
+                num_beams=num_beams,
+                num_return_sequences=num_returns,
+                temperature=1.5,
+            )
         tgt_text = self.tokenizer.batch_decode(translated, skip_special_tokens=True)
-        return [str(x) for x in tgt_text]
+        return [
+            [str(x) for x in tgt_text[index : index + num_returns]]
+            for index in range(0, len(tgt_text), num_returns)
+        ]
+
+    def get_responses(
+        self,
+        input_texts: list[str],
+        num_returns: int = 10,
+        num_beams: int = 10,
+        batch_size: int = 8,
+    ) -> list[list[str]]:
+        """Get list of paraphrase response for each input text string.
+
+        Duplicated or cached text generated once, others sorted by token length
+        and generated by batch to reduce padding.
+        """
+        num_returns = min(num_returns, num_beams)
+        keys = [self.to_key(x, num_returns, num_beams) for x in input_texts]
+        result: dict[str, list[str]] = {}
+        for key in keys:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                result[key] = self.cache[key]
+
+        missing = list(
+            dict.fromkeys(x for x, k in zip(input_texts, keys) if k not in result)
+        )
+        if missing:
+            if not self.tokenizer:
+                raise TypeError("PegasusTokenizer is None!")
+            lengths = self.tokenizer(
+                missing, truncation=True, max_length=self.max_length
+            )["input_ids"]
+            missing = [x for _, x in sorted(zip(map(len, lengths), missing))]
+            for index in range(0, len(missing), batch_size):
+                chunk = missing[index : index + batch_size]
+                for text, response in zip(
+                    chunk, self.generate(chunk, num_returns, num_beams)
+                ):
+                    result[self.to_key(text, num_returns, num_beams)] = response
+            self.update_cache(keys, result, len(missing))
+
+        return [list(result[key]) for key in keys]
+
+    def get_response(
+        self, input_text: str, num_returns: int = 10, num_beams: int = 10
+    ) -> list[str]:
+        """Get list of paraphrase response for input text string."""
+        return self.get_responses([input_text], num_returns, num_beams)[0]
 
     def example(
         self, num_returns: int = 10, num_beams: int = 10, index: int = 0
@@ -68,6 +321,17 @@ class Pegasus:
 class TestSpinner:
     """TestCase for Spinner."""
 
+    sentences = [
+        "The ultimate test of your knowledge is your capacity to convey it.",
+        "Proud food ninja.",
+        "Infuriatingly humble coffee nerd who spends every weekend in the garden.",
+        "Food trailblazer.",
+        "Unapologetic bacon scholar with a taste for long walks and old movies.",
+        "Music lover.",
+        "Friendly beer guru, web evangelist and lifelong travel enthusiast.",
+        "Zombie fanatic.",
+    ]
+
     @staticmethod
     def test_pegasus() -> None:
         """Test Pegasus."""
@@ -84,6 +348,137 @@ class TestSpinner:
             print(res)
             assert res
 
+    def test_responses(self) -> None:
+        """Test batch responses in order of input, cached in memory and file."""
+        file_cache = DIR_DEBUG / "spinner.json"
+        IO.file_del(file_cache)
+        app = Pegasus(cache_size=16, file_cache=file_cache, save_interval=3600)
+        texts = self.sentences + self.sentences[:2]
+        result = app.get_responses(texts, num_returns=3, num_beams=3, batch_size=4)
+        assert len(result) == len(texts)
+        assert all(len(x) == 3 and all(x) for x in result)
+        assert result[0] == result[-2] and result[1] == result[-1]
+        assert len(app.cache) == len(self.sentences)
+
+        # cache hits never generate, `unsaved` counts generated responses
+        assert app.get_responses(texts, num_returns=3, num_beams=3) == result
+        assert app.unsaved == len(self.sentences)
+
+        # cache file saved on close, not after every call
+        assert not file_cache.is_file()
+        app.close()
+        assert file_cache.is_file() and app.unsaved == 0
+
+        app = Pegasus(cache_size=4, file_cache=file_cache)
+        assert len(app.cache) == 4
+        text, expected = self.sentences[-1], result[len(self.sentences) - 1]
+        assert app.get_response(text, num_returns=3, num_beams=3) == expected
+        IO.file_del(file_cache)
+
+    def test_lazy(self) -> None:
+        """Test import and init without torch, model loaded on first call."""
+        code = (
+            "import sys, time; start = time.perf_counter(); "
+            "from pyatom.nlp.spinner import Pegasus; app = Pegasus(); "
+            "print(time.perf_counter() - start, 'torch' in sys.modules, app.loaded)"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, check=True, text=True
+        ).stdout.split()
+        print(f"import and init: {float(output[0]) * 1000:.1f}ms")
+        assert output[1:] == ["False", "False"]
+
+        file_cache = DIR_DEBUG / "spinner.json"
+        key = Pegasus().to_key("cached", 1, 1)
+        IO.save_dict(file_cache, {key: ["from cache"]})
+        app = Pegasus(file_cache=file_cache)
+        assert app.get_response("cached", 1, 1) == ["from cache"]
+        assert not app.loaded
+        for other in (Pegasus(backend="int8"), Pegasus(model_path="local/model")):
+            assert other.to_key("cached", 1, 1) != key
+        IO.file_del(file_cache)
+
+    def test_local_model(self) -> None:
+        """Test loading model from local directory with warm up."""
+        dir_model = DIR_DEBUG / "pegasus"
+        Pegasus(device="cpu").model.save_pretrained(dir_model)
+        Pegasus(device="cpu").tokenizer.save_pretrained(dir_model)
+
+        app = Pegasus(model_path=dir_model, device="cpu", cache_size=0)
+        assert not app.loaded
+        print(f"warm up: {app.warm_up():.2f}s")
+        assert app.loaded and app.torch_device == "cpu"
+        assert all(app.get_response(self.sentences[0], 3, 3))
+        IO.dir_del(dir_model)
+
+    def test_bench_responses(self, number: int = 32, num_beams: int = 4) -> None:
+        """Benchmark CPU sentences/sec one by one vs batch vs cached."""
+        app = Pegasus(device="cpu", warmup=True, cache_size=0)
+        texts = [f"{x} #{i}" for i in range(number // 8) for x in self.sentences]
+
+        start = time.perf_counter()
+        for text in texts[: number // 4]:
+            app.get_response(text, num_returns=1, num_beams=num_beams)
+        single = number // 4 / (time.perf_counter() - start)
+
+        result = {}
+        for batch_size in (4, 8, 16):
+            start = time.perf_counter()
+            app.get_responses(texts, 1, num_beams, batch_size=batch_size)
+            result[batch_size] = number / (time.perf_counter() - start)
+
+        app.cache_size = number
+        app.get_responses(texts, 1, num_beams)
+        start = time.perf_counter()
+        app.get_responses(texts, 1, num_beams)
+        cached = number / (time.perf_counter() - start)
+
+        print(f"single: {single:.2f}/s")
+        for batch_size, speed in result.items():
+            print(f"batch <{batch_size}>: {speed:.2f}/s")
+        print(f"cached: {cached:.0f}/s")
+        assert max(result.values()) > single
+
+    def test_bench_backends(self, num_beams: int = 4) -> None:
+        """Benchmark latency, throughput and similarity of backends vs fp32."""
+        texts = self.sentences * 2
+        expected: list[list[str]] = []
+        for backend in Pegasus.backends:
+            for num_threads in (1, os.cpu_count() or 1):
+                try:
+                    app = Pegasus(
+                        device="cpu",
+                        backend=backend,
+                        num_threads=num_threads,
+                        warmup=True,
+                        cache_size=0,
+                    )
+                except ImportError as err:
+                    print(f"{backend}: skipped, {err}")
+                    break
+
+                start = time.perf_counter()
+                for text in self.sentences[:4]:
+                    app.get_response(text, num_returns=1, num_beams=num_beams)
+                latency = (time.perf_counter() - start) / 4
+
+                start = time.perf_counter()
+                result = app.get_responses(texts, 1, num_beams, batch_size=8)
+                throughput = len(texts) / (time.perf_counter() - start)
+
+                expected = expected or result
+                similarity = sum(
+                    SequenceMatcher(None, x[0], y[0]).ratio()
+                    for x, y in zip(result, expected)
+                ) / len(texts)
+                print(
+                    f"{backend} <{num_threads}>threads: "
+                    f"latency {latency * 1000:.0f}ms, "
+                    f"throughput {throughput:.2f}/s, "
+                    f"similarity {similarity:.3f}"
+                )
+                assert similarity > 0.5
+
 
 if __name__ == "__main__":
     TestSpinner()